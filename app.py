@@ -1,8 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import markets, calculators, news, blog
+from routers import markets, calculators, news, blog, stream, metrics
+from services import http_client
+from services.metrics import MetricsMiddleware, loop_lag_monitor
+from services.scheduler import scheduler
+from services.shared_cache import shared_cache
+from services.timeseries import timeseries
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ingestão de cotações em background (jobs registrados pelos routers)
+    scheduler.start()
+    loop_lag_monitor.start()
+    yield
+    await loop_lag_monitor.stop()
+    await scheduler.stop()
+    # Fecha os pools de conexões keep-alive dos upstreams
+    await http_client.close_clients()
+    timeseries.close()
+    if shared_cache is not None:
+        shared_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configuração de CORS (Permite que o React acesse o Python)
 origins = [
@@ -20,11 +42,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Routers servidos sob /api
+API_PREFIX = "/api"
+api_routers = (markets.router, calculators.router, news.router, blog.router, stream.router)
+
+# Latência/status por rota para o /metrics (o rótulo inclui o prefixo com que cada router foi incluído)
+app.add_middleware(MetricsMiddleware, prefixos={API_PREFIX: api_routers})
+
 # Incluindo as rotas com o prefixo /api
-app.include_router(markets.router, prefix="/api")
-app.include_router(calculators.router, prefix="/api")
-app.include_router(news.router, prefix="/api")
-app.include_router(blog.router, prefix="/api")
+for router in api_routers:
+    app.include_router(router, prefix=API_PREFIX)
+# /metrics fica fora do /api (caminho padrão do scrape do Prometheus)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
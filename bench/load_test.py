@@ -0,0 +1,268 @@
+"""
+Teste de carga das rotas /api: dispara requisições numa taxa alvo (open loop) e reporta
+latência p50/p95/p99 e vazão por rota.
+
+Contra um app já rodando:
+
+    python bench/load_test.py --base-url http://127.0.0.1:8000 --rps 200 --duration 30
+
+Ou sobe tudo sozinho (stub dos provedores + app apontando para ele, dados em diretório temporário):
+
+    python bench/load_test.py --spawn --rps 200 --duration 30 --stub-latency 0.08 --max-p99 250
+
+Com --max-p99/--max-error-rate o processo sai com código 1 se algum limite for estourado (uso em CI).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple, Union
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lote de salário líquido maior que um bloco (FOLHA_LOTE = 5000), enviado como NDJSON em streaming
+LOTE_FUNCIONARIOS = 6000
+LOTE_NDJSON = b"\n".join(
+    json.dumps({"id": f"f{i}", "salario_bruto": 1500 + (i * 37) % 25000, "dependentes": i % 4}).encode()
+    for i in range(LOTE_FUNCIONARIOS)
+)
+
+# (nome, método, caminho, corpo) — mix padrão com todas as rotas /api
+# Corpo: dict vai como JSON; (content-type, bytes) vai cru
+ROTAS: List[Tuple[str, str, str, Optional[Union[Dict, Tuple[str, bytes]]]]] = [
+    ("cotacao", "GET", "/api/cotacao", None),
+    ("indicadores", "GET", "/api/indicadores", None),
+    ("indicadores-serie", "GET", "/api/indicadores/serie/432?inicio=2025-01-01", None),
+    ("historico", "GET", "/api/historico/dolar?dias=30", None),
+    ("historico-periodo", "GET", "/api/historico/dolar?start=2024-01-01&end=2025-06-30", None),
+    ("exchange-rates", "GET", "/api/exchange-rates", None),
+    ("exchange-pairs", "GET", "/api/exchange-rates?pairs=EUR-ARS,BRL-BTC,CLP-MXN", None),
+    ("exchange-matrix", "GET", "/api/exchange-rates/matrix", None),
+    ("indexes-brazil", "GET", "/api/indexes/brazil", None),
+    ("indexes-argentina", "GET", "/api/indexes/argentina", None),
+    ("indexes-usa", "GET", "/api/indexes/usa", None),
+    ("noticias", "GET", "/api/noticias", None),
+    ("blog", "GET", "/api/blog", None),
+    ("blog-artigo", "GET", "/api/blog/reserva-de-emergencia", None),
+    ("juros-compostos", "POST", "/api/juros-compostos",
+     {"aporte_inicial": 1000, "aporte_mensal": 500, "taxa_anual": 12, "anos": 10}),
+    ("juros-cenarios", "POST", "/api/juros-compostos/cenarios",
+     {"aporte_inicial": 1000, "taxa_anual": [6, 8, 10, 12, 14], "aporte_mensal": [200, 500, 1000, 2000], "anos": [5, 10, 20, 30]}),
+    ("financiamento", "POST", "/api/financiamento",
+     {"valor_financiamento": 300000, "taxa_mensal": 0.9, "meses": 360}),
+    ("salario-liquido", "POST", "/api/salario-liquido",
+     {"salario_bruto": 8500, "dependentes": 1, "outros_descontos": 0}),
+    ("financiamento-tabela", "POST", "/api/financiamento/tabela",
+     {"valor_financiamento": 300000, "taxa_mensal": 0.9, "meses": 360, "sistema": "sac",
+      "amortizacoes_extras": [{"mes": 24, "valor": 20000}], "correcao": "tr"}),
+    ("salario-lote", "POST", "/api/salario-liquido/lote", ("application/x-ndjson", LOTE_NDJSON)),
+]
+
+
+class Resultado:
+    __slots__ = ("latencias", "erros", "status")
+
+    def __init__(self):
+        self.latencias: List[float] = []
+        self.erros = 0
+        self.status: Dict[str, int] = {}
+
+
+async def _requisitar(client: httpx.AsyncClient, rota, resultado: Resultado, registrar: bool):
+    _, metodo, caminho, corpo = rota
+    inicio = time.perf_counter()
+    try:
+        if isinstance(corpo, tuple):
+            resp = await client.request(metodo, caminho, content=corpo[1], headers={"content-type": corpo[0]})
+        else:
+            resp = await client.request(metodo, caminho, json=corpo)
+        status = str(resp.status_code)
+        erro = resp.status_code >= 400
+    except Exception as e:
+        status = type(e).__name__
+        erro = True
+    latencia = time.perf_counter() - inicio
+
+    if registrar:
+        resultado.latencias.append(latencia)
+        resultado.status[status] = resultado.status.get(status, 0) + 1
+        if erro:
+            resultado.erros += 1
+
+
+async def executar(base_url: str, rotas, rps: float, duracao: float, warmup: float, max_inflight: int):
+    """Open loop: a cada 1/rps segundos dispara a próxima rota do mix, sem esperar as anteriores"""
+    resultados = {rota[0]: Resultado() for rota in rotas}
+    limits = httpx.Limits(max_connections=max_inflight, max_keepalive_connections=max_inflight)
+    descartadas = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        tasks = set()
+        intervalo = 1 / rps
+        inicio = time.perf_counter()
+        fim_warmup = inicio + warmup
+        fim = fim_warmup + duracao
+        i = 0
+
+        while True:
+            alvo = inicio + i * intervalo
+            if alvo >= fim:
+                break
+            espera = alvo - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+
+            rota = rotas[i % len(rotas)]
+            i += 1
+            if len(tasks) >= max_inflight:
+                # App não acompanha a taxa: conta como descartada em vez de virar closed loop
+                descartadas += 1
+                continue
+            task = asyncio.create_task(_requisitar(client, rota, resultados[rota[0]], alvo >= fim_warmup))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+        decorrido = time.perf_counter() - fim_warmup
+
+    return resultados, decorrido, descartadas
+
+
+def _percentis(latencias: List[float]) -> Dict[str, float]:
+    if not latencias:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "media": 0.0, "max": 0.0}
+    ms = np.asarray(latencias) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "media": float(ms.mean()), "max": float(ms.max())}
+
+
+def relatorio(resultados: Dict[str, Resultado], decorrido: float, descartadas: int) -> Dict:
+    rotas = {}
+    todas: List[float] = []
+    erros = 0
+    for nome, r in resultados.items():
+        todas.extend(r.latencias)
+        erros += r.erros
+        rotas[nome] = {"n": len(r.latencias), "erros": r.erros, "status": r.status, **_percentis(r.latencias)}
+
+    total = len(todas)
+    return {
+        "rotas": rotas,
+        "total": {
+            "n": total,
+            "erros": erros,
+            "descartadas": descartadas,
+            "error_rate": erros / total if total else 0.0,
+            "throughput": total / decorrido if decorrido > 0 else 0.0,
+            **_percentis(todas),
+        },
+    }
+
+
+def imprimir(rep: Dict):
+    print(f"{'rota':<20} {'n':>6} {'erros':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for nome, r in [*rep["rotas"].items(), ("TOTAL", rep["total"])]:
+        print(f"{nome:<20} {r['n']:>6} {r['erros']:>6} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f} {r['max']:>9.2f}")
+    total = rep["total"]
+    print(f"\nVazão: {total['throughput']:.1f} req/s | erros: {total['error_rate']:.2%} | descartadas: {total['descartadas']}")
+
+
+def _esperar(url: str, timeout: float = 30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} não respondeu em {timeout:.0f}s")
+
+
+def subir_ambiente(args) -> List[subprocess.Popen]:
+    """Sobe o stub dos provedores e o app (uvicorn) apontando para ele, com dados isolados"""
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    stub = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "bench", "upstream_stub.py"), "--port", str(args.stub_port),
+        "--latency", str(args.stub_latency), "--jitter", str(args.stub_jitter), "--error-rate", str(args.stub_error_rate),
+    ])
+    _esperar(f"{stub_url}/_stub/config")
+
+    env = {**os.environ, "UPSTREAM_STUB_URL": stub_url, "DATA_DIR": tempfile.mkdtemp(prefix="julishub-bench-")}
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.app_port), "--workers", str(args.workers),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    _esperar(f"http://127.0.0.1:{args.app_port}/")
+    return [app, stub]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga das rotas /api do JulisHub")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=100, help="taxa alvo (requisições/s)")
+    parser.add_argument("--duration", type=float, default=20, help="duração medida (s)")
+    parser.add_argument("--warmup", type=float, default=3, help="aquecimento não medido (s)")
+    parser.add_argument("--max-inflight", type=int, default=256)
+    parser.add_argument("--routes", help="subconjunto do mix, ex: cotacao,exchange-rates")
+    parser.add_argument("--json", help="grava o relatório em JSON neste arquivo")
+    parser.add_argument("--max-p99", type=float, help="falha se o p99 total passar disso (ms)")
+    parser.add_argument("--max-error-rate", type=float, help="falha se a taxa de erro passar disso (0-1)")
+    parser.add_argument("--spawn", action="store_true", help="sobe stub + app automaticamente")
+    parser.add_argument("--app-port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--stub-port", type=int, default=8900)
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    parser.add_argument("--stub-jitter", type=float, default=0.02)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    rotas = ROTAS
+    if args.routes:
+        nomes = set(args.routes.split(","))
+        rotas = [rota for rota in ROTAS if rota[0] in nomes]
+        if not rotas:
+            parser.error(f"nenhuma rota conhecida em --routes (disponíveis: {', '.join(r[0] for r in ROTAS)})")
+
+    processos = []
+    base_url = args.base_url
+    try:
+        if args.spawn:
+            processos = subir_ambiente(args)
+            base_url = f"http://127.0.0.1:{args.app_port}"
+
+        print(f"🚀 {args.rps:.0f} req/s por {args.duration:.0f}s (+{args.warmup:.0f}s de aquecimento) em {base_url}")
+        resultados, decorrido, descartadas = asyncio.run(
+            executar(base_url, rotas, args.rps, args.duration, args.warmup, args.max_inflight)
+        )
+    finally:
+        for proc in processos:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    rep = relatorio(resultados, decorrido, descartadas)
+    imprimir(rep)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rep, f, indent=2)
+
+    total = rep["total"]
+    falhou = False
+    if args.max_p99 is not None and total["p99"] > args.max_p99:
+        print(f"❌ p99 {total['p99']:.2f}ms acima do limite de {args.max_p99:.2f}ms")
+        falhou = True
+    if args.max_error_rate is not None and total["error_rate"] > args.max_error_rate:
+        print(f"❌ Taxa de erro {total['error_rate']:.2%} acima do limite de {args.max_error_rate:.2%}")
+        falhou = True
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
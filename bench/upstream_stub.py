@@ -0,0 +1,191 @@
+"""
+Servidor local que substitui os provedores externos (AwesomeAPI, HG Brasil, BCB, CoinGecko, Google News)
+para benchmarks reproduzíveis e offline.
+
+Responde com as respostas gravadas em bench/fixtures/, com latência, jitter e taxa de erro configuráveis.
+Cada provedor fica num prefixo próprio; aponte o app para cá com:
+
+    python bench/upstream_stub.py --port 8900 --latency 0.08 --jitter 0.04 --error-rate 0.01
+    UPSTREAM_STUB_URL=http://127.0.0.1:8900 uvicorn app:app
+
+A configuração pode ser trocada durante o teste (injeção de falhas):
+
+    curl -X PUT localhost:8900/_stub/config -H 'content-type: application/json' -d '{"error_rate": 0.5}'
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _load(nome: str):
+    with open(os.path.join(FIXTURES_DIR, nome), "rb") as f:
+        return f.read() if nome.endswith(".xml") else json.loads(f.read())
+
+
+AWESOMEAPI_LAST = _load("awesomeapi_last.json")
+HGBRASIL_FINANCE = _load("hgbrasil_finance.json")
+COINGECKO_PRICE = _load("coingecko_price.json")
+BCB_SGS = _load("bcb_sgs.json")
+GOOGLENEWS_RSS = _load("googlenews_rss.xml")
+
+# Latência base + jitter uniforme (segundos) e fração de respostas 503; por provedor sobrescreve o global
+config: Dict = {
+    "latency": 0.05,
+    "jitter": 0.02,
+    "error_rate": 0.0,
+    "providers": {},  # ex: {"hgbrasil": {"latency": 0.8, "error_rate": 0.2}}
+}
+stats: Dict[str, int] = {}
+_rng = random.Random(0)
+
+app = FastAPI(title="JulisHub upstream stub")
+
+
+def _param(provider: str, nome: str) -> float:
+    return config["providers"].get(provider, {}).get(nome, config[nome])
+
+
+@app.middleware("http")
+async def simular_rede(request: Request, call_next):
+    provider = request.url.path.strip("/").split("/", 1)[0]
+    if provider == "_stub":
+        return await call_next(request)
+
+    stats[provider] = stats.get(provider, 0) + 1
+    atraso = _param(provider, "latency") + _rng.uniform(-1, 1) * _param(provider, "jitter")
+    if atraso > 0:
+        await asyncio.sleep(atraso)
+    if _rng.random() < _param(provider, "error_rate"):
+        return JSONResponse({"error": "stub: erro simulado"}, status_code=503)
+    return await call_next(request)
+
+
+@app.get("/_stub/config")
+async def get_config():
+    return {"config": config, "requests": stats}
+
+
+@app.put("/_stub/config")
+async def put_config(novo: Dict):
+    config.update({k: v for k, v in novo.items() if k in config})
+    return config
+
+
+# --- AwesomeAPI ---
+
+@app.get("/awesomeapi/last/{pares}")
+async def awesomeapi_last(pares: str):
+    result = {}
+    for par in pares.split(","):
+        item = AWESOMEAPI_LAST.get(par.replace("-", ""))
+        if item:
+            result[par.replace("-", "")] = item
+    if not result:
+        return JSONResponse({"status": 404, "code": "CoinNotExists"}, status_code=404)
+    return result
+
+
+@app.get("/awesomeapi/json/daily/{symbol}/{dias}")
+async def awesomeapi_daily(symbol: str, dias: int, start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """Candles diários gerados a partir da cotação gravada (passeio aleatório determinístico por símbolo)"""
+    item = AWESOMEAPI_LAST.get(symbol.replace("-", ""))
+    if not item:
+        return JSONResponse({"status": 404, "code": "CoinNotExists"}, status_code=404)
+
+    fim = datetime.strptime(end_date, "%Y%m%d").date() if end_date else date.today()
+    inicio = datetime.strptime(start_date, "%Y%m%d").date() if start_date else fim - timedelta(days=dias - 1)
+    rng = random.Random(symbol)
+    valor = float(item["bid"])
+
+    candles = []
+    dia = fim
+    while dia >= inicio and len(candles) < dias:
+        ts = int(datetime(dia.year, dia.month, dia.day, 17).timestamp())
+        candles.append({**item, "bid": f"{valor:.4f}", "timestamp": str(ts)})
+        valor *= 1 + rng.gauss(0, 0.008)
+        dia -= timedelta(days=1)
+    return candles
+
+
+# --- HG Brasil ---
+
+@app.get("/hgbrasil/finance")
+async def hgbrasil_finance():
+    return HGBRASIL_FINANCE
+
+
+# --- BCB SGS ---
+
+def _sgs(codigo: str):
+    serie = BCB_SGS.get(codigo)
+    if serie is None:
+        return None
+    return [(datetime.strptime(item["data"], "%d/%m/%Y").date(), item) for item in serie]
+
+
+@app.get("/bcb/dados/serie/bcdata.sgs.{codigo}/dados")
+async def bcb_serie(codigo: str, dataInicial: Optional[str] = None, dataFinal: Optional[str] = None):
+    serie = _sgs(codigo)
+    if serie is None:
+        return JSONResponse({"error": "Série não encontrada"}, status_code=404)
+    inicio = datetime.strptime(dataInicial, "%d/%m/%Y").date() if dataInicial else date.min
+    fim = datetime.strptime(dataFinal, "%d/%m/%Y").date() if dataFinal else date.max
+    return [item for dia, item in serie if inicio <= dia <= fim]
+
+
+@app.get("/bcb/dados/serie/bcdata.sgs.{codigo}/dados/ultimos/{n}")
+async def bcb_ultimos(codigo: str, n: int):
+    serie = _sgs(codigo)
+    if serie is None:
+        return JSONResponse({"error": "Série não encontrada"}, status_code=404)
+    return [item for _, item in serie[-n:]]
+
+
+# --- CoinGecko ---
+
+@app.get("/coingecko/api/v3/simple/price")
+async def coingecko_price():
+    return COINGECKO_PRICE
+
+
+@app.get("/coingecko/api/v3/ping")
+async def coingecko_ping():
+    return {"gecko_says": "(V3) To the Moon!"}
+
+
+# --- Google News ---
+
+@app.get("/googlenews/rss")
+@app.get("/googlenews/rss/search")
+async def googlenews_rss():
+    return Response(content=GOOGLENEWS_RSS, media_type="application/rss+xml")
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub local dos provedores externos do JulisHub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=config["latency"], help="latência base (s)")
+    parser.add_argument("--jitter", type=float, default=config["jitter"], help="variação uniforme ± (s)")
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"], help="fração de respostas 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    _rng.seed(args.seed)
+    print(f"🧪 Stub dos provedores em http://{args.host}:{args.port} ({config})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
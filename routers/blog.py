@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Dict, Any, Optional
 import logging
+import os
+from services.responses import cached_json, dumps, etag_for
 
 router = APIRouter()
 
@@ -455,22 +457,27 @@ O Tesouro Direto é perfeito para:
 ]
 
 
+# Artigos são estáticos: respostas serializadas uma única vez, na importação
+# A listagem vai sem o campo 'conteudo' para deixar a resposta mais leve
+ARTIGOS_RESUMO_JSON = dumps([{k: v for k, v in artigo.items() if k != "conteudo"} for artigo in ARTIGOS])
+ARTIGOS_RESUMO_ETAG = etag_for(ARTIGOS_RESUMO_JSON)
+ARTIGOS_JSON = {artigo["slug"]: dumps(artigo) for artigo in ARTIGOS}
+ARTIGOS_ETAG = {slug: etag_for(body) for slug, body in ARTIGOS_JSON.items()}
+
+# Cache no cliente/CDN: conteúdo só muda com deploy, revalidado pelo ETag
+BLOG_MAX_AGE = int(os.getenv("BLOG_MAX_AGE", "3600"))
+BLOG_STALE_SECONDS = int(os.getenv("BLOG_STALE_SECONDS", "86400"))
+
+
 @router.get("/blog")
-async def get_artigos():
+async def get_artigos(request: Request):
     """
     Retorna lista de todos os artigos (sem o campo 'conteudo' para otimizar performance).
     Ideal para a listagem do blog.
     """
     try:
         logger.info(f"📚 Listando {len(ARTIGOS)} artigos do blog")
-        
-        # Remove o campo 'conteudo' para deixar a resposta mais leve
-        artigos_resumo = [
-            {k: v for k, v in artigo.items() if k != 'conteudo'}
-            for artigo in ARTIGOS
-        ]
-        
-        return artigos_resumo
+        return cached_json(request, ARTIGOS_RESUMO_JSON, ARTIGOS_RESUMO_ETAG, BLOG_MAX_AGE, BLOG_STALE_SECONDS)
     
     except Exception as e:
         logger.error(f"❌ Erro ao listar artigos: {e}")
@@ -478,22 +485,22 @@ async def get_artigos():
 
 
 @router.get("/blog/{slug}")
-async def get_artigo(slug: str):
+async def get_artigo(request: Request, slug: str):
     """
     Retorna um artigo completo (incluindo conteúdo em Markdown) pelo slug.
     """
     try:
         logger.info(f"📖 Buscando artigo: {slug}")
         
-        # Busca o artigo pelo slug
-        artigo = next((a for a in ARTIGOS if a["slug"] == slug), None)
+        # Busca o artigo pelo slug (lookup no dict de respostas prontas)
+        body = ARTIGOS_JSON.get(slug)
         
-        if not artigo:
+        if body is None:
             logger.warning(f"⚠️ Artigo não encontrado: {slug}")
             raise HTTPException(status_code=404, detail=f"Artigo '{slug}' não encontrado")
         
-        logger.info(f"✅ Artigo encontrado: {artigo['titulo']}")
-        return artigo
+        logger.info(f"✅ Artigo encontrado: {slug}")
+        return cached_json(request, body, ARTIGOS_ETAG[slug], BLOG_MAX_AGE, BLOG_STALE_SECONDS)
     
     except HTTPException:
         raise
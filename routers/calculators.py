@@ -1,58 +1,96 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Dict, Any, Literal, Optional, Tuple
+import logging
+import numpy as np
+import orjson
+from services import amortizacao, folha
+from services.amortizacao import FINANCIAMENTO_MAX_MESES
+from services.sgs import sgs
+from services.tributos import TRIBUTOS_COMPETENCIA, TabelaTributos, tributos
+from services.juros import JUROS_MAX_ANOS, JUROS_MAX_CENARIOS, cenarios, meses_do_grafico, saldo, taxa_mensal
+from services.responses import dumps, json_bytes
 
 router = APIRouter()
 
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Séries do SGS usadas na correção monetária do financiamento (variação mensal, %)
+SGS_CORRECAO = {"tr": 7811, "ipca": 433}
+# Meses da série usados para projetar a correção (média)
+CORRECAO_MESES = 12
+
 # --- 1. Simulador de Juros Compostos (Investimento) ---
 class JurosCompostosInput(BaseModel):
     aporte_inicial: float
     aporte_mensal: float
-    taxa_anual: float
-    anos: int
+    taxa_anual: float = Field(gt=-100)
+    anos: int = Field(ge=0, le=JUROS_MAX_ANOS)
+    # Pontos do gráfico: mensal, trimestral ou anual (limitado a JUROS_MAX_PONTOS)
+    granularidade: Literal["mensal", "trimestral", "anual"] = "anual"
 
 @router.post("/juros-compostos")
 def calcular_juros_compostos(dados: JurosCompostosInput):
+    # Forma fechada: custo proporcional aos pontos do gráfico, não aos meses simulados
     meses = dados.anos * 12
-    taxa_mensal = (1 + dados.taxa_anual / 100) ** (1/12) - 1
-    
-    saldo = dados.aporte_inicial
-    total_investido = dados.aporte_inicial
-    
-    grafico = []
-    
-    # Adiciona o ponto inicial (mês 0)
-    grafico.append({
-        "mes": 0,
-        "ano": 0,
-        "investido": round(total_investido, 2),
-        "juros": 0,
-        "total": round(saldo, 2)
-    })
-
-    for mes in range(1, meses + 1):
-        saldo = saldo * (1 + taxa_mensal) + dados.aporte_mensal
-        total_investido += dados.aporte_mensal
-        
-        if mes % 12 == 0:  # Salva pontos anuais para o gráfico não ficar gigante
-            grafico.append({
-                "mes": mes,
-                "ano": mes // 12,
-                "investido": round(total_investido, 2),
-                "juros": round(saldo - total_investido, 2),
-                "total": round(saldo, 2)
-            })
-            
+    pontos = meses_do_grafico(meses, dados.granularidade)
+
+    total = saldo(dados.aporte_inicial, dados.aporte_mensal, taxa_mensal(dados.taxa_anual), pontos)
+    investido = dados.aporte_inicial + dados.aporte_mensal * pontos
+    juros = total - investido
+
+    grafico = [
+        {
+            "mes": mes,
+            "ano": mes // 12 if mes % 12 == 0 else round(mes / 12, 2),
+            "investido": inv,
+            "juros": jur,
+            "total": tot,
+        }
+        for mes, inv, jur, tot in zip(
+            pontos.tolist(), np.round(investido, 2).tolist(), np.round(juros, 2).tolist(), np.round(total, 2).tolist()
+        )
+    ]
+    grafico[0]["juros"] = 0
+
     return {
         "grafico": grafico,
         "resumo": {
-            "total_investido": round(total_investido, 2),
-            "total_juros": round(saldo - total_investido, 2),
-            "total_final": round(saldo, 2)
+            "total_investido": grafico[-1]["investido"],
+            "total_juros": grafico[-1]["juros"],
+            "total_final": grafico[-1]["total"]
         }
     }
 
 
+# Comparação de cenários: grade taxa × aporte × anos numa única requisição
+class CenariosInput(BaseModel):
+    aporte_inicial: float = 0
+    taxa_anual: List[Annotated[float, Field(gt=-100)]] = Field(min_length=1)
+    aporte_mensal: List[float] = Field(min_length=1)
+    anos: List[Annotated[int, Field(ge=0, le=JUROS_MAX_ANOS)]] = Field(min_length=1)
+
+@router.post("/juros-compostos/cenarios")
+def calcular_cenarios(dados: CenariosInput):
+    """
+    Todas as combinações de taxa_anual × aporte_mensal × anos, em colunas
+    (o cenário i é taxa_anual[i], aporte_mensal[i], anos[i] → total_final[i])
+    """
+    n = len(dados.taxa_anual) * len(dados.aporte_mensal) * len(dados.anos)
+    if n > JUROS_MAX_CENARIOS:
+        raise HTTPException(status_code=400, detail=f"Grade com {n} cenários (máximo {JUROS_MAX_CENARIOS})")
+
+    colunas = cenarios(dados.aporte_inicial, dados.taxa_anual, dados.aporte_mensal, dados.anos)
+    for nome in ("total_investido", "total_juros", "total_final"):
+        colunas[nome] = np.round(colunas[nome], 2)
+
+    return json_bytes(dumps({"n": n, "aporte_inicial": dados.aporte_inicial, **colunas}))
+
+
 # --- 2. Calculadora de Financiamento (Price) ---
 class FinanciamentoInput(BaseModel):
     valor_financiamento: float
@@ -81,60 +119,87 @@ def calcular_financiamento(dados: FinanciamentoInput):
     }
 
 
-# --- 3. Calculadora de Salário Líquido (CLT 2024) ---
+class AmortizacaoExtra(BaseModel):
+    mes: int = Field(ge=1)
+    valor: float = Field(gt=0)
+
+class TabelaFinanciamentoInput(BaseModel):
+    valor_financiamento: float = Field(gt=0)
+    taxa_mensal: float = Field(ge=0)
+    meses: int = Field(ge=1, le=FINANCIAMENTO_MAX_MESES)
+    sistema: Literal["price", "sac"] = "price"
+    amortizacoes_extras: List[AmortizacaoExtra] = []
+    # Correção monetária do saldo: TR ou IPCA projetados pela média recente do BCB
+    correcao: Literal["nenhuma", "tr", "ipca"] = "nenhuma"
+    # % a.m.; se informado, substitui a projeção da série
+    correcao_mensal: Optional[float] = Field(default=None, gt=-100)
+
+async def projetar_correcao(dados: TabelaFinanciamentoInput) -> Tuple[float, str]:
+    """(correção mensal em %, origem) para a tabela"""
+    if dados.correcao == "nenhuma":
+        return 0.0, "nenhuma"
+    if dados.correcao_mensal is not None:
+        return dados.correcao_mensal, "informada"
+
+    codigo = SGS_CORRECAO[dados.correcao]
+    await sgs.ensure(codigo)
+    valores = sgs.serie(codigo).valores[-CORRECAO_MESES:]
+    if not len(valores):
+        logger.warning(f"⚠️ Série {codigo} indisponível, tabela sem correção")
+        return 0.0, "indisponivel"
+    return float(valores.mean()), f"SGS {codigo} ({len(valores)} meses)"
+
+@router.post("/financiamento/tabela")
+async def tabela_financiamento(dados: TabelaFinanciamentoInput, formato: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Tabela de amortização completa (Price ou SAC), com amortizações extras e correção TR/IPCA.
+    Enviada em streaming, linha a linha: NDJSON (última linha com o resumo) ou CSV (?formato=csv).
+    """
+    correcao, origem = await projetar_correcao(dados)
+    colunas = amortizacao.tabela(
+        dados.valor_financiamento,
+        dados.taxa_mensal / 100,
+        dados.meses,
+        dados.sistema,
+        correcao / 100,
+        [(extra.mes, extra.valor) for extra in dados.amortizacoes_extras],
+    )
+
+    headers = {"X-Correcao-Mensal": f"{correcao:.4f}", "X-Correcao-Origem": origem}
+    if formato == "csv":
+        headers["Content-Disposition"] = f'attachment; filename="financiamento-{dados.sistema}.csv"'
+        return StreamingResponse(amortizacao.csv(colunas), media_type="text/csv; charset=utf-8", headers=headers)
+    return StreamingResponse(amortizacao.ndjson(colunas), media_type="application/x-ndjson", headers=headers)
+
+
+# --- 3. Calculadora de Salário Líquido (CLT) ---
+# Competência AAAA-MM que escolhe a tabela de INSS/IRRF (padrão: TRIBUTOS_COMPETENCIA)
+COMPETENCIA = r"^\d{4}-(0[1-9]|1[0-2])$"
+
 class SalarioLiquidoInput(BaseModel):
     salario_bruto: float
     dependentes: int = 0
     outros_descontos: float = 0
+    competencia: Optional[str] = Field(None, pattern=COMPETENCIA)
+
+def tabela_tributos(competencia: Optional[str]) -> TabelaTributos:
+    try:
+        return tributos.tabela(competencia)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/salario-liquido")
 def calcular_salario_liquido(dados: SalarioLiquidoInput):
     sb = dados.salario_bruto
-    
-    # A. Cálculo INSS (Tabela Progressiva 2024)
-    # Teto do salário de contribuição: R$ 7.786,02
-    teto_inss = 7786.02
-    faixas_inss = [
-        (1412.00, 0.075),
-        (2666.68, 0.09),
-        (4000.03, 0.12),
-        (7786.02, 0.14)
-    ]
-    
-    inss = 0.0
-    salario_restante = min(sb, teto_inss)
-    faixa_anterior = 0
-    
-    for limite, aliquota in faixas_inss:
-        if salario_restante > faixa_anterior:
-            base_faixa = min(salario_restante, limite) - faixa_anterior
-            inss += base_faixa * aliquota
-            faixa_anterior = limite
-        else:
-            break
-            
-    # B. Cálculo IRRF (Tabela Vigente 2024 - A partir de Fev/24)
-    # Dedução por dependente: R$ 189,59
-    deducao_dependente = dados.dependentes * 189.59
-    base_irrf = sb - inss - deducao_dependente
-    
-    # Faixas IRRF e Parcelas a deduzir
-    faixas_irrf = [
-        (2259.20, 0.0, 0.0),
-        (2826.65, 0.075, 169.44),
-        (3751.05, 0.15, 381.44),
-        (4664.68, 0.225, 662.77),
-        (float('inf'), 0.275, 896.00)
-    ]
-    
-    irrf = 0.0
-    for limite, aliquota, deducao in faixas_irrf:
-        if base_irrf <= limite:
-            irrf = (base_irrf * aliquota) - deducao
-            break
-            
-    if irrf < 0: irrf = 0.0
-    
+    # Tabela pré-compilada da competência: faixa por busca binária, INSS pelo acumulado das faixas
+    tabela = tabela_tributos(dados.competencia)
+
+    # A. Cálculo INSS (progressivo, limitado ao teto da tabela)
+    inss = tabela.inss(sb)
+
+    # B. Cálculo IRRF (base = bruto - INSS - dedução por dependente)
+    irrf = tabela.irrf(sb - inss - dados.dependentes * tabela.deducao_dependente)
+
     # Resultado Final
     salario_liquido = sb - inss - irrf - dados.outros_descontos
     
@@ -144,5 +209,77 @@ def calcular_salario_liquido(dados: SalarioLiquidoInput):
         "irrf": round(irrf, 2),
         "outros_descontos": round(dados.outros_descontos, 2),
         "salario_liquido": round(salario_liquido, 2),
-        "total_descontos": round(inss + irrf + dados.outros_descontos, 2)
-    }
\ No newline at end of file
+        "total_descontos": round(inss + irrf + dados.outros_descontos, 2),
+        "tabela": tabela.vigencia
+    }
+
+@router.get("/salario-liquido/tabelas")
+def listar_tabelas_tributos():
+    """Tabelas de INSS/IRRF disponíveis (vigência e faixas) e a competência padrão"""
+    return {"padrao": TRIBUTOS_COMPETENCIA, "tabelas": tributos.snapshot()}
+
+
+# Lote (integração de RH): milhares de funcionários por requisição, calculados em blocos vetorizados
+FORMATOS_LOTE = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8", "json": "application/json"}
+
+@router.post("/salario-liquido/lote")
+async def calcular_salario_liquido_lote(
+    request: Request,
+    formato: Optional[Literal["ndjson", "csv", "json"]] = None,
+    competencia: Optional[str] = Query(None, pattern=COMPETENCIA),
+):
+    """
+    Salário líquido de vários funcionários. Entrada conforme o Content-Type:
+    - application/json: array de {"salario_bruto", "dependentes", "outros_descontos", "id"}
+    - application/x-ndjson: um objeto por linha
+    - text/csv: cabeçalho com salario_bruto e opcionalmente dependentes, outros_descontos, id
+      (vírgula, ou ponto e vírgula com vírgula decimal); valor inválido devolve 400 com a linha
+    Saída em streaming (?formato=ndjson|csv|json; padrão: csv para entrada CSV, senão ndjson).
+    No JSON e no NDJSON, linhas inválidas voltam com o campo "erro" em vez de interromper o lote.
+    ?competencia=AAAA-MM escolhe a tabela de INSS/IRRF do lote inteiro (cabeçalho X-Tabela-Tributos).
+    """
+    tabela = tabela_tributos(competencia)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    # O corpo é todo lido (e convertido em colunas) antes de responder: ler request.stream() dentro
+    # do StreamingResponse disputa o receive() com a detecção de desconexão e trava uploads grandes
+    if "csv" in content_type or "ndjson" in content_type or "jsonl" in content_type:
+        leitor = folha.lotes_csv if "csv" in content_type else folha.lotes_ndjson
+        try:
+            lotes = [lote async for lote in leitor(request.stream())]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        try:
+            itens = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Corpo inválido: envie um array JSON de funcionários")
+        if not isinstance(itens, list):
+            raise HTTPException(status_code=400, detail="Corpo inválido: envie um array JSON de funcionários")
+        lotes = list(folha.lotes_json(itens))
+
+    formato = formato or ("csv" if "csv" in content_type else "ndjson")
+
+    async def gerar():
+        if formato == "csv":
+            yield folha.csv_cabecalho()
+        elif formato == "json":
+            yield b"["
+
+        total = 0
+        for lote in lotes:
+            # Formatação no threadpool para não segurar o event loop em lotes grandes
+            if formato == "csv":
+                yield await run_in_threadpool(folha.csv, lote, tabela)
+            else:
+                corpo = await run_in_threadpool(folha.ndjson, lote, tabela)
+                if formato == "json":
+                    corpo = (b"," if total else b"") + corpo.rstrip(b"\n").replace(b"\n", b",")
+                yield corpo
+            total += len(lote.ids)
+
+        if formato == "json":
+            yield b"]"
+        logger.info(f"✅ Lote de salário líquido: {total} funcionários")
+
+    return StreamingResponse(gerar(), media_type=FORMATOS_LOTE[formato], headers={"X-Tabela-Tributos": tabela.vigencia})
+
@@ -1,8 +1,25 @@
-from fastapi import APIRouter, HTTPException
-import requests
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Query, Request
+import asyncio
+import httpx
+import os
+import time
+from datetime import date, datetime, timedelta
 from typing import Optional
 import logging
+import numpy as np
+from services import circuit_breaker, deadline, http_client
+from services.providers import awesomeapi_last, hgbrasil_finance
+from services.responses import entry_response, value_response
+from services.cache import CacheEntry, SWRCache
+from services.singleflight import upstream
+from services.quote_store import quote_store
+from services.scheduler import scheduler
+from services.timeseries import timeseries
+from services.downsample import METODOS, downsample
+from services.fx import INDISPONIVEL, RateVector, atualizado_em, build_rate_vector, cotar, label, parse_pairs
+from services.indexes import INDICES, indexes
+from services.sgs import SERIES as SGS_SERIES, sgs
+from services.upstreams import AWESOMEAPI_URL, COINGECKO_URL
 
 router = APIRouter()
 
@@ -10,45 +27,85 @@ router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache simples em memória (1 hora)
-_cache_indicadores = {
-    "data": None,
-    "timestamp": None,
-}
-
-_cache_exchange = {
-    "data": None,
-    "timestamp": None,
-}
-
-_cache_indexes = {
-    "data": None,
-    "timestamp": None,
-}
-
+# Cache stale-while-revalidate: 1h fresco, até 6h servindo e revalidando em background
 CACHE_DURATION = timedelta(hours=1)
-
-
-def is_cache_valid(cache_timestamp: Optional[datetime]) -> bool:
-    """Verifica se o cache ainda é válido (menos de 1 hora)"""
-    if cache_timestamp is None:
-        return False
-    return datetime.now() - cache_timestamp < CACHE_DURATION
-
-
-def fetch_awesomeapi():
+CACHE_HARD_DURATION = timedelta(hours=6)
+
+cache_indicadores = SWRCache("indicadores", CACHE_DURATION, CACHE_HARD_DURATION)
+# RateVector não é JSON: fica só no worker (com o quote store, cada worker monta o seu)
+cache_exchange = SWRCache("exchange", CACHE_DURATION, CACHE_HARD_DURATION, shared=False)
+cache_indexes = SWRCache("indexes", CACHE_DURATION, CACHE_HARD_DURATION)
+
+# /cotacao: corrida entre provedores (COTACAO_RACE=0 volta ao modo sequencial)
+COTACAO_RACE = os.getenv("COTACAO_RACE", "1") != "0"
+COTACAO_DEADLINE = float(os.getenv("COTACAO_DEADLINE", "5"))
+COTACAO_CAMPOS = ("dolar", "euro", "bitcoin", "ibovespa")
+
+# Ingestão em background: intervalo de polling (segundos) por provedor
+POLL_AWESOMEAPI_SECONDS = float(os.getenv("POLL_AWESOMEAPI_SECONDS", "60"))
+POLL_HGBRASIL_SECONDS = float(os.getenv("POLL_HGBRASIL_SECONDS", "300"))
+POLL_COINGECKO_SECONDS = float(os.getenv("POLL_COINGECKO_SECONDS", "120"))
+POLL_BCB_SECONDS = float(os.getenv("POLL_BCB_SECONDS", "3600"))
+
+# Histórico diário local (SQLite): backfill único e depois só os candles mais novos
+HISTORICO_SIMBOLOS = {"dolar": "USD-BRL", "euro": "EUR-BRL", "bitcoin": "BTC-USD"}
+HISTORICO_BACKFILL_DIAS = int(os.getenv("HISTORICO_BACKFILL_DIAS", "365"))
+HISTORICO_MAX_DIAS = int(os.getenv("HISTORICO_MAX_DIAS", "3650"))
+HISTORICO_SYNC_SECONDS = float(os.getenv("HISTORICO_SYNC_SECONDS", "900"))
+# Máximo de pontos devolvidos ao gráfico (intervalos longos são reduzidos no servidor)
+HISTORICO_MAX_POINTS = int(os.getenv("HISTORICO_MAX_POINTS", "500"))
+
+# Orçamento de latência de /exchange-rates sob demanda: AwesomeAPI e CoinGecko em paralelo dentro dele
+EXCHANGE_BUDGET = float(os.getenv("EXCHANGE_BUDGET", "3"))
+
+# Câmbio: só cotações USD-X são buscadas; demais pares saem por triangulação
+FX_MOEDAS = [moeda.strip().upper() for moeda in os.getenv("FX_MOEDAS", "BRL,EUR,ARS,CLP,MXN").split(",") if moeda.strip()]
+FX_CODES = ["USD", *FX_MOEDAS, "BTC"]
+EXCHANGE_PARES_PADRAO = [
+    # Principais
+    ("USD", "BRL"), ("EUR", "BRL"), ("EUR", "USD"), ("BTC", "USD"), ("BTC", "BRL"),
+    # América do Sul
+    ("USD", "ARS"), ("ARS", "BRL"), ("BRL", "ARS"),  # Argentina
+    ("USD", "CLP"), ("CLP", "BRL"),  # Chile
+    # América Central
+    ("USD", "MXN"), ("MXN", "BRL"),  # México
+]
+
+# Séries do SGS usadas em /indicadores
+SGS_SELIC = 432
+SGS_IPCA = 13522
+
+# Dados do quote store mais velhos que isso são ignorados (rota volta a buscar sob demanda)
+STORE_MAX_AGE = CACHE_HARD_DURATION
+
+
+def store_response(request: Request, entry, poll_seconds: float):
+    """Entrada do quote store: fresca até o próximo polling, stale até STORE_MAX_AGE"""
+    return entry_response(request, entry, poll_seconds, STORE_MAX_AGE.total_seconds())
+
+
+def vector_response(request: Request, value, vector: RateVector):
+    """Resposta montada do vetor de taxas: fresca até o próximo polling (parcial não é cacheada)"""
+    max_age = 0 if vector.parcial else POLL_AWESOMEAPI_SECONDS - (time.time() - vector.timestamp)
+    return value_response(request, value, max_age, STORE_MAX_AGE.total_seconds())
+
+
+def com_atualizado_em(response, vector: Optional[RateVector], pares):
+    """Horário da cotação mais velha em X-Atualizado-Em (fora do corpo, que é publicado e vira ETag)"""
+    if vector is not None:
+        response.headers["X-Atualizado-Em"] = str(atualizado_em(vector, pares))
+    return response
+
+
+async def fetch_awesomeapi():
     """Tenta buscar dados da AwesomeAPI"""
     try:
         logger.info("🔄 Buscando dados da AwesomeAPI...")
-        # Busca Dólar, Euro e Bitcoin
-        url = "https://economia.awesomeapi.com.br/last/USD-BRL,EUR-BRL,BTC-USD"
-        resp = requests.get(url, timeout=5)
-        
-        if resp.status_code != 200:
-            logger.warning(f"⚠️ AwesomeAPI retornou status {resp.status_code}")
+        # Busca Dólar, Euro e Bitcoin (no mesmo lote de pares que o /exchange-rates)
+        data = await awesomeapi_last(["USD-BRL", "EUR-BRL", "BTC-USD"])
+        if not data:
             return None
 
-        data = resp.json()
         logger.info("✅ Dados da AwesomeAPI obtidos com sucesso")
         
         return {
@@ -69,7 +126,7 @@ def fetch_awesomeapi():
                 "var": "0.00",
             },
         }
-    except requests.Timeout:
+    except httpx.TimeoutException:
         logger.error("❌ Timeout ao acessar AwesomeAPI")
         return None
     except Exception as e:
@@ -77,20 +134,15 @@ def fetch_awesomeapi():
         return None
 
 
-def fetch_hgbrasil():
+async def fetch_hgbrasil():
     """Fallback: Tenta buscar da HG Brasil (dados podem ter delay de 15min na free)"""
     try:
-        logger.info("🔄 Tentando HG Brasil como fallback...")
-        # A chave pública da HG Brasil para testes é 'key=development' ou sem chave (limite baixo)
-        # O ideal é você criar uma conta grátis em hgbrasil.com e colocar sua chave aqui
-        url = "https://api.hgbrasil.com/finance?format=json-cors&key=development"
-        resp = requests.get(url, timeout=5)
-        
-        if resp.status_code != 200:
-            logger.warning(f"⚠️ HG Brasil retornou status {resp.status_code}")
+        logger.info("🔄 Buscando dados da HG Brasil...")
+        # Documento /finance compartilhado com /indexes/brazil (um download para as duas rotas)
+        data = await hgbrasil_finance()
+        if not data:
             return None
 
-        data = resp.json()["results"]
         currencies = data["currencies"]
         stocks = data["stocks"]
         
@@ -114,7 +166,7 @@ def fetch_hgbrasil():
                 "var": str(stocks["IBOVESPA"]["variation"]),
             },
         }
-    except requests.Timeout:
+    except httpx.TimeoutException:
         logger.error("❌ Timeout ao acessar HG Brasil")
         return None
     except Exception as e:
@@ -122,91 +174,63 @@ def fetch_hgbrasil():
         return None
 
 
-def get_indicadores():
+async def fetch_indicadores():
     """
-    Busca indicadores econômicos oficiais do Banco Central do Brasil (SGS)
+    Indicadores econômicos oficiais do Banco Central do Brasil (SGS)
     - SELIC Meta: Código 432
     - IPCA (12 meses): Código 13522
     - CDI estimado: Selic - 0.10%
-    
-    Implementa cache de 1 hora para evitar rate limiting
+    As séries são sincronizadas em paralelo e só com as observações novas (store local)
     """
-    global _cache_indicadores
-    
-    # Verifica se o cache é válido
-    if is_cache_valid(_cache_indicadores["timestamp"]):
-        logger.info("📦 Retornando indicadores do cache (ainda válido)")
-        return _cache_indicadores["data"]
-    
-    logger.info("🔄 Cache expirado ou inexistente. Buscando dados do Banco Central...")
-    
-    try:
-        # Busca SELIC Meta (últimos 1 valores)
-        url_selic = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.432/dados/ultimos/1?formato=json"
-        logger.info(f"   → Requisitando SELIC: {url_selic}")
-        resp_selic = requests.get(url_selic, timeout=5)
-
-        # Busca IPCA (últimos 1 valores)
-        url_ipca = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.13522/dados/ultimos/1?formato=json"
-        logger.info(f"   → Requisitando IPCA: {url_ipca}")
-        resp_ipca = requests.get(url_ipca, timeout=5)
-
-        if resp_selic.status_code != 200 or resp_ipca.status_code != 200:
-            logger.error(f"❌ API do BC retornou erro. SELIC: {resp_selic.status_code}, IPCA: {resp_ipca.status_code}")
-            return None
+    logger.info("🔄 Buscando dados do Banco Central...")
 
-        selic_data = resp_selic.json()
-        ipca_data = resp_ipca.json()
+    sincronizadas = await sgs.sync([SGS_SELIC, SGS_IPCA])
+    if not all(sincronizadas.values()):
+        logger.warning(f"⚠️ Falha ao sincronizar séries do BC: {sincronizadas}")
 
-        if not selic_data or not ipca_data:
-            logger.error("❌ API do BC retornou dados vazios")
-            return None
+    selic = sgs.ultimo(SGS_SELIC)
+    ipca = sgs.ultimo(SGS_IPCA)
+    if not selic or not ipca:
+        logger.error("❌ Séries do BC indisponíveis (sem dados locais)")
+        return None
 
-        selic_valor = float(selic_data[0]["valor"])
-        ipca_valor = float(ipca_data[0]["valor"])
-        cdi_estimado = selic_valor - 0.10  # CDI é geralmente Selic - 0.10%
+    (selic_data, selic_valor), (ipca_data, ipca_valor) = selic, ipca
+    cdi_estimado = selic_valor - 0.10  # CDI é geralmente Selic - 0.10%
 
-        result = {
-            "selic": {
-                "valor": f"{selic_valor:.2f}",
-                "data": selic_data[0]["data"],
-                "descricao": "Taxa SELIC Meta (% a.a.)",
-            },
-            "ipca": {
-                "valor": f"{ipca_valor:.2f}",
-                "data": ipca_data[0]["data"],
-                "descricao": "IPCA - 12 meses (% a.a.)",
-            },
-            "cdi": {
-                "valor": f"{cdi_estimado:.2f}",
-                "descricao": "CDI Estimado (% a.a.)",
-            },
-        }
-        
-        # Atualiza o cache
-        _cache_indicadores["data"] = result
-        _cache_indicadores["timestamp"] = datetime.now()
-        logger.info(f"✅ Indicadores obtidos com sucesso! SELIC: {selic_valor}%, IPCA: {ipca_valor}%")
-        logger.info(f"📦 Cache atualizado. Válido até {_cache_indicadores['timestamp'] + CACHE_DURATION}")
-        
-        return result
-        
-    except requests.Timeout:
-        logger.error("❌ Timeout ao acessar API do Banco Central")
-        return None
-    except Exception as e:
-        logger.error(f"❌ Erro get_indicadores: {e}")
-        return None
+    result = {
+        "selic": {
+            "valor": f"{selic_valor:.2f}",
+            "data": selic_data.strftime("%d/%m/%Y"),
+            "descricao": SGS_SERIES[SGS_SELIC],
+        },
+        "ipca": {
+            "valor": f"{ipca_valor:.2f}",
+            "data": ipca_data.strftime("%d/%m/%Y"),
+            "descricao": SGS_SERIES[SGS_IPCA],
+        },
+        "cdi": {
+            "valor": f"{cdi_estimado:.2f}",
+            "descricao": "CDI Estimado (% a.a.)",
+        },
+    }
+
+    logger.info(f"✅ Indicadores obtidos com sucesso! SELIC: {selic_valor}%, IPCA: {ipca_valor}%")
+    return result
 
 
 @router.get("/indicadores")
-def route_indicadores():
+async def route_indicadores(request: Request):
     """Rota para retornar indicadores econômicos oficiais do Banco Central"""
     logger.info("📊 Requisição recebida: /indicadores")
-    indicadores = get_indicadores()
+
+    entry = quote_store.get("indicadores", STORE_MAX_AGE)
+    if entry:
+        return store_response(request, entry, POLL_BCB_SECONDS)
+
+    entry = await cache_indicadores.get_entry("bcb:sgs", fetch_indicadores, source="BCB SGS")
 
     # Fallback: se o BC falhar, retorna valores zerados para não quebrar o frontend
-    if not indicadores:
+    if not entry:
         logger.warning("⚠️ Retornando valores zerados (fallback)")
         return {
             "selic": {
@@ -223,359 +247,595 @@ def route_indicadores():
             "erro": "Não foi possível buscar dados do Banco Central no momento",
         }
 
-    return indicadores
+    return entry_response(request, entry, cache_indicadores.soft_ttl, cache_indicadores.hard_ttl)
 
 
-@router.get("/cotacao")
-def get_cotacao():
+@router.get("/indicadores/serie/{codigo}")
+async def get_indicador_serie(request: Request, codigo: int, inicio: Optional[date] = None, fim: Optional[date] = None):
     """
-    Rota de cotações com fallback robusto:
-    1. Tenta AwesomeAPI (melhor para moedas em tempo real)
-    2. Se falhar, tenta HG Brasil
-    3. Se tudo falhar, retorna valores zerados para não quebrar o Frontend
+    Série histórica de um indicador do SGS (ex: 432 SELIC, 13522 IPCA 12m)
+    - inicio/fim (YYYY-MM-DD) opcionais, inclusivos
+    - Resposta em colunas (datas e valores), servida da série local em memória
     """
-    logger.info("💱 Requisição recebida: /cotacao")
-    
-    # 1. Tenta AwesomeAPI (Melhor para moedas em tempo real)
-    data = fetch_awesomeapi()
+    logger.info(f"📊 Requisição recebida: /indicadores/serie/{codigo}")
 
-    # 2. Se falhar ou se quisermos complementar (ex: IBOV), tenta HG Brasil
-    if not data:
-        logger.warning("⚠️ AwesomeAPI falhou, tentando HG Brasil...")
-        data = fetch_hgbrasil()
+    if codigo not in SGS_SERIES:
+        raise HTTPException(status_code=404, detail=f"Série não disponível. Use: {', '.join(map(str, SGS_SERIES))}")
+    if inicio and fim and inicio > fim:
+        raise HTTPException(status_code=400, detail="inicio deve ser anterior a fim")
+
+    await sgs.ensure(codigo)
+    dias, valores = sgs.serie(codigo).intervalo(inicio, fim)
+
+    result = {
+        "codigo": codigo,
+        "descricao": SGS_SERIES[codigo],
+        "datas": np.datetime_as_string(dias).tolist(),
+        "valores": valores.tolist(),
+    }
+    if not len(sgs.serie(codigo)):
+        result["erro"] = "Não foi possível buscar dados do Banco Central no momento"
+        return result
+    # Fresca só até a próxima sincronização da série, não um SGS_SYNC_SECONDS inteiro a cada resposta
+    return value_response(request, result, sgs.validade(codigo), STORE_MAX_AGE.total_seconds())
+
+
+async def fetch_cotacao_sequencial():
+    """
+    Modo sequencial (cadeia de fallback):
+    1. Tenta os provedores em ordem adaptativa (circuito fechado, menor latência e mais sucesso primeiro)
+    2. Provedores com circuito aberto falham na hora, sem esperar timeout
+    3. Se faltar IBOVESPA, busca só o IBOV na HG Brasil
+    """
+    cadeia = {"AwesomeAPI": fetch_awesomeapi, "HG Brasil": fetch_hgbrasil}
+
+    data = None
+    for nome in circuit_breaker.ordenar(cadeia):
+        data = await cadeia[nome]()
+        if data:
+            break
+        logger.warning(f"⚠️ {nome} falhou, tentando o próximo provedor...")
 
-    # 3. Se tudo falhar, retorna zerado para não quebrar o Frontend
     if not data:
-        logger.error("❌ Todas as APIs falharam! Retornando valores zerados")
-        return {
-            "dolar": {"valor": "0.00", "var": "0.00"},
-            "euro": {"valor": "0.00", "var": "0.00"},
-            "bitcoin": {"valor": "0.00", "var": "0.00"},
-            "ibovespa": {"valor": "0.00", "var": "0.00"},
-        }
+        return None
 
     # Se conseguimos dados da AwesomeAPI mas falta IBOVESPA, tentamos pegar só IBOV da HG
     if data["ibovespa"]["valor"] == "0.00":
         logger.info("🔄 Buscando IBOVESPA complementar da HG Brasil...")
-        hg_data = fetch_hgbrasil()
+        hg_data = await fetch_hgbrasil()
         if hg_data:
             data["ibovespa"] = hg_data["ibovespa"]
             logger.info("✅ IBOVESPA complementado com sucesso")
 
-    logger.info("✅ Cotações retornadas com sucesso")
     return data
 
 
+async def fetch_cotacao_corrida(deadline: float = COTACAO_DEADLINE):
+    """
+    Modo corrida: dispara AwesomeAPI e HG Brasil em paralelo e mescla os campos
+    conforme chegam (moedas do primeiro que responder, IBOVESPA da HG).
+    Retorna assim que o conjunto estiver completo ou o prazo expirar.
+    """
+    loop = asyncio.get_running_loop()
+    limite = loop.time() + deadline
 
-@router.get("/historico/{moeda}")
-def get_historico(moeda: str):
+    tasks = {
+        asyncio.create_task(fetch_awesomeapi()): "AwesomeAPI",
+        asyncio.create_task(fetch_hgbrasil()): "HG Brasil",
+    }
+    pending = set(tasks)
+    data = {}
+
+    try:
+        while pending and len(data) < len(COTACAO_CAMPOS):
+            restante = limite - loop.time()
+            if restante <= 0:
+                break
+
+            done, pending = await asyncio.wait(pending, timeout=restante, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if not result:
+                    logger.warning(f"⚠️ {tasks[task]} falhou na corrida")
+                    continue
+
+                for campo in COTACAO_CAMPOS:
+                    # AwesomeAPI não tem IBOV (vem zerado), então só aceitamos valores reais
+                    if campo not in data and result[campo]["valor"] != "0.00":
+                        data[campo] = result[campo]
+                logger.info(f"🏁 {tasks[task]} respondeu ({len(data)}/{len(COTACAO_CAMPOS)} campos)")
+    finally:
+        # Quem não respondeu a tempo é cancelado para não segurar conexões
+        for task in pending:
+            task.cancel()
+
+    if pending:
+        logger.warning(f"⏱️ Prazo de {deadline}s expirado. Campos obtidos: {list(data)}")
+
+    return data or None
+
+
+@router.get("/cotacao")
+async def get_cotacao(request: Request):
     """
-    Retorna histórico de 30 dias de uma moeda
-    AwesomeAPI ainda é a melhor opção para histórico gratuito simples
+    Rota de cotações com fallback robusto:
+    - Modo corrida (padrão): AwesomeAPI e HG Brasil em paralelo, com prazo máximo
+    - Modo sequencial (COTACAO_RACE=0): AwesomeAPI, depois HG Brasil
+    - Campos que faltarem retornam zerados para não quebrar o Frontend
     """
-    logger.info(f"📈 Requisição recebida: /historico/{moeda}")
-    symbol_map = {"dolar": "USD-BRL", "euro": "EUR-BRL", "bitcoin": "BTC-USD"}
+    logger.info("💱 Requisição recebida: /cotacao")
+
+    entry = quote_store.get("cotacao", STORE_MAX_AGE)
+    if entry:
+        return store_response(request, entry, POLL_AWESOMEAPI_SECONDS)
+
+    # O prazo vale para a rota inteira: no modo sequencial o fallback usa só o que sobrou dele
+    with deadline.orcamento(COTACAO_DEADLINE):
+        if COTACAO_RACE:
+            data = await fetch_cotacao_corrida()
+        else:
+            data = await fetch_cotacao_sequencial()
+
+    # Se tudo falhar, retorna zerado para não quebrar o Frontend
+    if not data:
+        logger.error("❌ Todas as APIs falharam! Retornando valores zerados")
+        data = {}
+
+    for campo in COTACAO_CAMPOS:
+        data.setdefault(campo, {"valor": "0.00", "var": "0.00"})
+
+    logger.info("✅ Cotações retornadas com sucesso")
+    # Sob demanda (sem scheduler): completa vale até o próximo polling; com campo zerado, revalida já
+    completa = all(data[campo]["valor"] != "0.00" for campo in COTACAO_CAMPOS)
+    return value_response(
+        request, {campo: data[campo] for campo in COTACAO_CAMPOS},
+        POLL_AWESOMEAPI_SECONDS if completa else 0, STORE_MAX_AGE.total_seconds() if completa else 0,
+    )
 
-    symbol = symbol_map.get(moeda)
-    if not symbol:
-        logger.warning(f"⚠️ Moeda inválida: {moeda}")
-        return []
 
+async def fetch_historico_awesomeapi(symbol: str, dias: int, inicio: Optional[date] = None, fim: Optional[date] = None):
+    """Busca N candles diários na AwesomeAPI (os últimos, ou do período inicio/fim) como (dia, timestamp, valor)"""
     try:
-        url = f"https://economia.awesomeapi.com.br/json/daily/{symbol}/30"
+        url = f"{AWESOMEAPI_URL}/json/daily/{symbol}/{dias}"
+        if inicio and fim:
+            url += f"?start_date={inicio:%Y%m%d}&end_date={fim:%Y%m%d}"
         logger.info(f"   → Buscando histórico: {url}")
-        resp = requests.get(url, timeout=5)
+        resp = await upstream.do(url, lambda: http_client.get(url, timeout=10))
 
         if resp.status_code != 200:
             logger.error(f"❌ Erro ao buscar histórico: status {resp.status_code}")
-            return []
-
-        data = resp.json()
-        historico = []
+            return None
 
-        for item in data:
+        bars = []
+        for item in resp.json():
             ts = int(item["timestamp"])
-            date_str = datetime.fromtimestamp(ts).strftime("%d/%m")
+            bars.append((datetime.fromtimestamp(ts).strftime("%Y-%m-%d"), ts, float(item["bid"])))
+
+        # Ordem cronológica: no mesmo dia, o candle mais recente é gravado por último
+        bars.sort(key=lambda bar: bar[1])
+        return bars
+    except httpx.TimeoutException:
+        logger.error(f"❌ Timeout ao buscar histórico de {symbol}")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Erro ao buscar histórico de {symbol}: {e}")
+        return None
+
+
+async def sync_historico(symbol: str) -> bool:
+    """Sincroniza a série local: backfill na primeira vez, depois só os dias novos"""
+    last_day = timeseries.last_day(symbol)
+    if last_day is None:
+        dias = HISTORICO_BACKFILL_DIAS
+        logger.info(f"🗄️ Backfill de {dias} dias para {symbol}")
+    else:
+        # Inclui o último dia salvo para atualizar o candle que ainda estava aberto
+        dias = (date.today() - date.fromisoformat(last_day)).days + 1
+
+    bars = await fetch_historico_awesomeapi(symbol, max(dias, 1))
+    if not bars:
+        return False
+
+    timeseries.upsert(symbol, bars)
+    if timeseries.coverage_since(symbol) is None:
+        timeseries.set_coverage(symbol, (date.today() - timedelta(days=dias - 1)).isoformat())
+    logger.info(f"✅ Histórico de {symbol} sincronizado (+{len(bars)} candles)")
+    return True
+
+
+async def backfill_historico(symbol: str, inicio: date, fim: date) -> bool:
+    """
+    Garante localmente o período [inicio, fim] (cada período é pedido ao upstream uma única vez).
+    Colado na cobertura contínua: estende a cobertura para trás até `inicio`. Isolado (bem antes
+    dela): baixa só [inicio, fim] e guarda a janela, sem nunca pedir mais que o período da requisição.
+    """
+    since = timeseries.coverage_since(symbol) or timeseries.first_day(symbol)
+    since = date.fromisoformat(since) if since else date.today() + timedelta(days=1)
+    if since <= inicio:
+        return True
+
+    contiguo = fim >= since - timedelta(days=1)
+    if contiguo:
+        fim = since - timedelta(days=1)
+    elif timeseries.window_covered(symbol, inicio.isoformat(), fim.isoformat()):
+        return True
+
+    dias = (fim - inicio).days + 1
+    logger.info(f"🗄️ Backfill de {symbol}: {inicio} → {fim} ({dias} dias)")
+
+    bars = await fetch_historico_awesomeapi(symbol, dias, inicio, fim)
+    if bars is None:
+        return False
 
-            historico.append({"data": date_str, "valor": float(item["bid"])})
+    timeseries.upsert(symbol, bars)
+    if contiguo:
+        # Outro backfill concorrente pode ter ido mais longe: a cobertura só recua
+        atual = timeseries.coverage_since(symbol)
+        if atual is None or inicio.isoformat() < atual:
+            timeseries.set_coverage(symbol, inicio.isoformat())
+    else:
+        timeseries.add_window(symbol, inicio.isoformat(), fim.isoformat())
+    return True
 
-        logger.info(f"✅ Histórico retornado: {len(historico)} registros")
-        return historico[::-1]
-    except requests.Timeout:
-        logger.error(f"❌ Timeout ao buscar histórico de {moeda}")
+
+async def ensure_historico(symbol: str):
+    """Sincroniza sob demanda se a série nunca foi baixada ou está desatualizada"""
+    last_sync = timeseries.last_sync(symbol)
+    if last_sync is None or time.time() - last_sync > HISTORICO_SYNC_SECONDS:
+        await upstream.do(f"historico:{symbol}", lambda: sync_historico(symbol))
+
+
+@router.get("/historico/{moeda}")
+async def get_historico(
+    request: Request,
+    moeda: str,
+    dias: int = Query(30, ge=1, le=HISTORICO_MAX_DIAS),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_points: int = Query(HISTORICO_MAX_POINTS, ge=3, le=5000),
+    metodo: str = Query("lttb", pattern=f"^({'|'.join(METODOS)})$"),
+):
+    """
+    Retorna histórico diário de uma moeda
+    - Sem start/end: últimos `dias` dias (padrão: 30)
+    - Com start/end (YYYY-MM-DD): período arbitrário, até HISTORICO_MAX_DIAS
+    - Intervalos com mais de `max_points` pontos são reduzidos (LTTB ou min/max)
+    Servido da série temporal local, sincronizada incrementalmente com a AwesomeAPI
+    """
+    logger.info(f"📈 Requisição recebida: /historico/{moeda}")
+
+    symbol = HISTORICO_SIMBOLOS.get(moeda)
+    if not symbol:
+        logger.warning(f"⚠️ Moeda inválida: {moeda}")
         return []
+
+    if start or end:
+        end = end or date.today()
+        start = start or end - timedelta(days=dias - 1)
+        if start > end:
+            raise HTTPException(status_code=400, detail="start deve ser anterior a end")
+        if (end - start).days >= HISTORICO_MAX_DIAS:
+            raise HTTPException(status_code=400, detail=f"Período máximo: {HISTORICO_MAX_DIAS} dias")
+
+    try:
+        await ensure_historico(symbol)
+        # ?dias=N além do que o backfill inicial guardou também estende a série para trás.
+        # A chave leva o período: quem pede um início anterior não pega carona num backfill mais curto
+        inicio = start or date.today() - timedelta(days=dias - 1)
+        fim = min(end or date.today(), date.today())
+        await upstream.do(f"historico-backfill:{symbol}:{inicio}:{fim}", lambda: backfill_historico(symbol, inicio, fim))
+        if start:
+            rows = timeseries.query(symbol, start.isoformat(), end.isoformat())
+        else:
+            rows = timeseries.query(symbol, last=dias)
     except Exception as e:
         logger.error(f"❌ Erro ao buscar histórico de {moeda}: {e}")
         return []
 
+    if not rows:
+        return []
 
-@router.get("/exchange-rates")
-def get_exchange_rates():
-    """
-    Retorna taxas de câmbio expandidas (USD, EUR, BRL, ARS, BTC)
-    Usa AwesomeAPI + CoinGecko para BTC
-    """
-    global _cache_exchange
-    
-    if is_cache_valid(_cache_exchange["timestamp"]):
-        logger.info("📦 Retornando exchange rates do cache")
-        return _cache_exchange["data"]
-    
-    logger.info("💱 Buscando dados frescos da API")
-    
+    serie = np.array(rows, dtype=np.float64)
+    ts, valores = serie[:, 0], serie[:, 1]
+    idx = downsample(ts, valores, max_points, metodo)
+
+    # Acima de um ano o ano entra no rótulo para não repetir datas
+    fmt = "%d/%m" if ts[-1] - ts[0] <= 366 * 86400 else "%d/%m/%Y"
+    historico = [
+        {"data": datetime.fromtimestamp(int(ts[i])).strftime(fmt), "valor": float(valores[i])}
+        for i in idx
+    ]
+
+    logger.info(f"✅ Histórico retornado: {len(historico)} de {len(rows)} registros")
+    return value_response(request, historico, HISTORICO_SYNC_SECONDS, STORE_MAX_AGE.total_seconds())
+
+
+async def fetch_exchange_awesomeapi():
+    """Busca na AwesomeAPI só as cotações USD-X (as demais saem por triangulação)"""
     try:
-        # AwesomeAPI - apenas moedas disponíveis (testadas)
-        all_pairs = [
-            # Principais
-            "USD-BRL", "EUR-BRL", "EUR-USD",
-            # América do Sul
-            "USD-ARS", "ARS-BRL",  # Argentina
-            "USD-CLP", "CLP-BRL",  # Chile
-            "USD-MXN", "MXN-BRL",  # México
-        ]
-        
-        # Faz uma única requisição com todos os pares disponíveis
-        url = f"https://economia.awesomeapi.com.br/last/{','.join(all_pairs)}"
-        resp = requests.get(url, timeout=10)
-        
-        if resp.status_code != 200:
-            raise Exception(f"AwesomeAPI status {resp.status_code}")
-        
-        data = resp.json()
-        
-        # CoinGecko para Bitcoin (grátis, sem API key)
-        btc_url = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd,brl"
-        btc_resp = requests.get(btc_url, timeout=5)
-        btc_data = btc_resp.json() if btc_resp.status_code == 200 else {"bitcoin": {"usd": 0, "brl": 0}}
-        
-        # Helper para conversão segura
-        def safe_float(value, default=0.0):
-            try:
-                return float(value) if value else default
-            except (ValueError, TypeError):
-                return default
-        
-        # Calcular BRL/ARS derivado (inverso de ARS/BRL)
-        usd_brl = safe_float(data.get("USDBRL", {}).get("bid"))
-        ars_brl = safe_float(data.get("ARSBRL", {}).get("bid"))
-        brl_ars = 1 / ars_brl if ars_brl > 0 else 0
-        
-        result = {
-            # Principais
-            "USD_BRL": {
-                "valor": data.get("USDBRL", {}).get("bid", "0"),
-                "var": data.get("USDBRL", {}).get("pctChange", "0"),
-                "label": "Dólar Comercial → Real",
-            },
-            "EUR_BRL": {
-                "valor": data.get("EURBRL", {}).get("bid", "0"),
-                "var": data.get("EURBRL", {}).get("pctChange", "0"),
-                "label": "Euro → Real",
-            },
-            "EUR_USD": {
-                "valor": data.get("EURUSD", {}).get("bid", "0"),
-                "var": data.get("EURUSD", {}).get("pctChange", "0"),
-                "label": "Euro → Dólar",
-            },
-            "BTC_USD": {
-                "valor": str(btc_data.get("bitcoin", {}).get("usd", 0)),
-                "var": "0.00",
-                "label": "Bitcoin → Dólar",
-            },
-            "BTC_BRL": {
-                "valor": str(btc_data.get("bitcoin", {}).get("brl", 0)),
-                "var": "0.00",
-                "label": "Bitcoin → Real",
-            },
-            
-            # América do Sul - Argentina
-            "USD_ARS": {
-                "valor": data.get("USDARS", {}).get("bid", "0"),
-                "var": data.get("USDARS", {}).get("pctChange", "0"),
-                "label": "Dólar → Peso Argentino",
-            },
-            "ARS_BRL": {
-                "valor": data.get("ARSBRL", {}).get("bid", "0"),
-                "var": data.get("ARSBRL", {}).get("pctChange", "0"),
-                "label": "Peso Argentino → Real",
-            },
-            "BRL_ARS": {
-                "valor": f"{brl_ars:.4f}",
-                "var": f"{-safe_float(data.get('ARSBRL', {}).get('pctChange')):.2f}",
-                "label": "Real → Peso Argentino",
-            },
-            
-            # América do Sul - Chile
-            "USD_CLP": {
-                "valor": data.get("USDCLP", {}).get("bid", "0"),
-                "var": data.get("USDCLP", {}).get("pctChange", "0"),
-                "label": "Dólar → Peso Chileno",
-            },
-            "CLP_BRL": {
-                "valor": data.get("CLPBRL", {}).get("bid", "0"),
-                "var": data.get("CLPBRL", {}).get("pctChange", "0"),
-                "label": "Peso Chileno → Real",
-            },
-            
-            # América Central - México
-            "USD_MXN": {
-                "valor": data.get("USDMXN", {}).get("bid", "0"),
-                "var": data.get("USDMXN", {}).get("pctChange", "0"),
-                "label": "Dólar → Peso Mexicano",
-            },
-            "MXN_BRL": {
-                "valor": data.get("MXNBRL", {}).get("bid", "0"),
-                "var": data.get("MXNBRL", {}).get("pctChange", "0"),
-                "label": "Peso Mexicano → Real",
-            },
-        }
-        
-        _cache_exchange["data"] = result
-        _cache_exchange["timestamp"] = datetime.now()
-        logger.info("✅ Exchange rates obtidos com sucesso")
+        # Conjunto mínimo de pares (base USD); pedidos concorrentes viram uma única requisição
+        return await awesomeapi_last([f"USD-{moeda}" for moeda in FX_MOEDAS])
+    except Exception as e:
+        logger.error(f"❌ Erro fetch_exchange_awesomeapi: {e}")
+        return None
+
+
+async def fetch_coingecko_btc():
+    """CoinGecko para Bitcoin (grátis, sem API key)"""
+    try:
+        btc_url = f"{COINGECKO_URL}/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_24hr_change=true"
+        btc_resp = await http_client.get(btc_url, timeout=5)
         
-        return result
+        if btc_resp.status_code != 200:
+            logger.warning(f"⚠️ CoinGecko retornou status {btc_resp.status_code}")
+            return None
         
+        return btc_resp.json()
     except Exception as e:
-        logger.error(f"❌ Erro ao buscar exchange rates: {e}")
-        # Retorna valores zerados como fallback
-        fallback_pairs = [
-            "USD_BRL", "EUR_BRL", "EUR_USD", "BTC_USD", "BTC_BRL",
-            "USD_ARS", "ARS_BRL", "BRL_ARS",
-            "USD_CLP", "CLP_BRL",
-            "USD_MXN", "MXN_BRL",
-        ]
-        return {pair: {"valor": "0.00", "var": "0.00", "label": pair.replace("_", " → ")} for pair in fallback_pairs}
+        logger.error(f"❌ Erro fetch_coingecko_btc: {e}")
+        return None
 
-@router.get("/indexes/brazil")
-def get_brazil_indexes():
+
+async def fetch_rate_vector():
     """
-    Retorna índices brasileiros da B3
-    Usa HG Brasil Finance API (grátis com limite)
+    Busca o vetor de taxas base USD (AwesomeAPI + CoinGecko para BTC) em paralelo, dentro de EXCHANGE_BUDGET.
+    Fonte que falhar ou não responder a tempo entra com o último valor conhecido do quote store
+    (marcada como stale) ou fica de fora; sem as cotações USD-X não há vetor.
     """
-    logger.info("📊 Requisição recebida: /indexes/brazil")
-    
-    try:
-        url = "https://api.hgbrasil.com/finance?format=json-cors&key=development"
-        resp = requests.get(url, timeout=5)
-        
-        if resp.status_code != 200:
-            raise Exception(f"HG Brasil status {resp.status_code}")
-        
-        data = resp.json()["results"]["stocks"]
-        
-        result = {
-            "IBOVESPA": {
-                "name": "IBOVESPA",
-                "label": "Ibovespa",
-                "valor": str(data["IBOVESPA"]["points"]),
-                "var": str(data["IBOVESPA"]["variation"]),
-                "description": "Índice Bovespa - Principal índice da B3",
-            },
-            "IFIX": {
-                "name": "IFIX",
-                "label": "IFIX",
-                "valor": str(data.get("IFIX", {}).get("points", "0")),
-                "var": str(data.get("IFIX", {}).get("variation", "0.00")),
-                "description": "Índice de Fundos Imobiliários",
-            },
+    logger.info("💱 Buscando dados frescos da API")
+
+    resultados, status = await deadline.reunir(
+        {"awesomeapi:exchange": fetch_exchange_awesomeapi, "coingecko:btc": fetch_coingecko_btc}, EXCHANGE_BUDGET
+    )
+
+    agora = time.time()
+    fontes = {}
+    for key, data in resultados.items():
+        if data:
+            fontes[key] = (data, agora, False)
+            continue
+        entry = quote_store.get(key, STORE_MAX_AGE)
+        if entry:
+            logger.warning(f"⚠️ {key} ({status[key]}): usando último valor conhecido ({entry.age:.0f}s)")
+            fontes[key] = (entry.value, entry.fetched_at, True)
+
+    if "awesomeapi:exchange" not in fontes:
+        return None
+
+    pares, pares_ts, pares_stale = fontes["awesomeapi:exchange"]
+    btc, btc_ts, btc_stale = fontes.get("coingecko:btc", (None, None, False))
+    stale = [*(FX_MOEDAS if pares_stale else ()), *(["BTC"] if btc_stale else ())]
+
+    logger.info(f"✅ Exchange rates obtidos ({status})")
+    return build_rate_vector(pares, btc, FX_MOEDAS, pares_ts, btc_ts, stale)
+
+
+async def get_rate_vector() -> Optional[RateVector]:
+    """Vetor de taxas do quote store (scheduler); sem ele, cache stale-while-revalidate"""
+    entry = quote_store.get("fx:vector", STORE_MAX_AGE)
+    if entry:
+        return entry.value
+
+    vector = await cache_exchange.get("fx:usd", fetch_rate_vector, source="AwesomeAPI+CoinGecko")
+    if vector is not None and vector.parcial:
+        # Resposta parcial não vale o TTL inteiro: a próxima leitura já revalida em background
+        cache_exchange.expire("fx:usd")
+    return vector
+
+
+@router.get("/exchange-rates")
+async def get_exchange_rates(request: Request, pairs: Optional[str] = None):
+    """
+    Retorna taxas de câmbio expandidas (USD, EUR, BRL, ARS, BTC)
+    - Sem parâmetros: pares padrão do frontend
+    - ?pairs=USD-BRL,EUR-ARS: qualquer par entre as moedas suportadas (triangulação via USD)
+    Se nunca houve dado bom, retorna zerado
+    """
+    pares = EXCHANGE_PARES_PADRAO
+    if pairs:
+        try:
+            pares = parse_pairs(pairs)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        suportadas = set(FX_CODES)
+        invalidas = sorted({moeda for par in pares for moeda in par} - suportadas)
+        if invalidas:
+            raise HTTPException(status_code=400, detail=f"Moedas não suportadas: {', '.join(invalidas)}")
+    else:
+        entry = quote_store.get("exchange-rates", STORE_MAX_AGE)
+        if entry:
+            vetor = quote_store.get("fx:vector", STORE_MAX_AGE)
+            return com_atualizado_em(store_response(request, entry, POLL_AWESOMEAPI_SECONDS),
+                                     vetor.value if vetor else None, pares)
+
+    vector = await get_rate_vector()
+
+    if not vector:
+        # Retorna valores zerados como fallback
+        return {
+            f"{base}_{quote}": {"valor": "0.00", "var": "0.00", "label": label(base, quote), "status": INDISPONIVEL}
+            for base, quote in pares
         }
-        
-        logger.info("✅ Índices brasileiros obtidos")
-        return result
-        
-    except Exception as e:
-        logger.error(f"❌ Erro ao buscar índices brasileiros: {e}")
+
+    return com_atualizado_em(vector_response(request, cotar(vector, pares), vector), vector, pares)
+
+
+@router.get("/exchange-rates/matrix")
+async def get_exchange_matrix(request: Request):
+    """
+    Matriz N×N de câmbio entre todas as moedas suportadas
+    matriz[i][j] = quanto vale 1 unidade de moedas[i] em moedas[j]
+    """
+    vector = await get_rate_vector()
+    if not vector:
+        raise HTTPException(status_code=503, detail="Taxas de câmbio indisponíveis no momento")
+
+    taxas, var = vector.matrix()
+    return vector_response(request, {
+        "moedas": list(vector.codes),
+        "matriz": taxas.tolist(),
+        "var": np.round(var, 2).tolist(),
+        "timestamp": vector.timestamp,
+    }, vector)
+
+
+async def fetch_brazil_indexes():
+    """
+    Busca índices brasileiros da B3 pelo registro de provedores (HG Brasil Finance)
+    """
+    return await indexes.regiao("brazil")
+
+
+async def indexes_response(request: Request, regiao: str):
+    """Índices da região pelo cache stale-while-revalidate; zerados se nenhum provedor responder"""
+    key = f"indexes:{regiao}"
+    entry = await cache_indexes.get_entry(key, lambda: indexes.regiao(regiao), source="indexes")
+    if entry is not None and getattr(entry.value, "parcial", False):
+        # Resposta parcial não vale o TTL inteiro: sai com max-age=0 e a próxima leitura já revalida em background
+        cache_indexes.expire(key)
+
+    if not entry:
         return {
-            "IBOVESPA": {"name": "IBOVESPA", "label": "Ibovespa", "valor": "0", "var": "0.00", "description": "Índice Bovespa"},
-            "IFIX": {"name": "IFIX", "label": "IFIX", "valor": "0", "var": "0.00", "description": "Índice de Fundos Imobiliários"},
+            simbolo: {"name": simbolo, "label": label, "valor": "0", "var": "0.00", "description": descricao}
+            for simbolo, (label, descricao) in INDICES[regiao].items()
         }
 
+    return entry_response(request, entry, cache_indexes.soft_ttl, cache_indexes.hard_ttl)
+
+
+@router.get("/indexes/brazil")
+async def get_brazil_indexes(request: Request):
+    """
+    Retorna índices brasileiros da B3 (quote store ou cache stale-while-revalidate)
+    """
+    logger.info("📊 Requisição recebida: /indexes/brazil")
+
+    entry = quote_store.get("indexes:brazil", STORE_MAX_AGE)
+    if entry:
+        return store_response(request, entry, POLL_HGBRASIL_SECONDS)
+
+    return await indexes_response(request, "brazil")
+
 
 @router.get("/indexes/argentina")
-def get_argentina_indexes():
+async def get_argentina_indexes(request: Request):
     """
     Retorna índices argentinos
-    Simulação com valores estáticos (APIs argentinas são limitadas/pagas)
+    Sem API gratuita da BYMA: valores de referência até um provedor real ser registrado em services/indexes.py
     """
     logger.info("📊 Requisição recebida: /indexes/argentina")
-    
-    # Nota: A maioria das APIs argentinas (BYMA) requer autenticação
-    # Para produção, considere: https://www.portfoliopersonal.com/ API
-    # Por ora, retornamos estrutura com dados mock
-    
-    return {
-        "MERVAL": {
-            "name": "MERVAL",
-            "label": "S&P Merval",
-            "valor": "1250000",  # Valor aproximado em ARS
-            "var": "1.25",
-            "description": "Índice Merval - Principal índice da Bolsa de Buenos Aires",
-        },
-        "BURCAP": {
-            "name": "BURCAP",
-            "label": "BURCAP",
-            "valor": "850000",
-            "var": "0.85",
-            "description": "Índice de Capitalização da BYMA",
-        },
-    }
+    return await indexes_response(request, "argentina")
 
 
 @router.get("/indexes/usa")
-def get_usa_indexes():
+async def get_usa_indexes(request: Request):
     """
     Retorna índices americanos
-    Usa Yahoo Finance alternativa (finnhub.io free tier)
+    Dow Jones e Nasdaq da HG Brasil (mesmo documento /finance); S&P 500 com valor de referência
     """
     logger.info("📊 Requisição recebida: /indexes/usa")
-    
-    try:
-        # Finnhub free API (sem API key necessária para cotações básicas)
-        # Nota: Para produção, registre em finnhub.io para obter API key
-        indexes = {
-            "^GSPC": "S&P 500",
-            "^DJI": "Dow Jones",
-            "^IXIC": "Nasdaq",
-        }
-        
-        result = {}
-        
-        # Alternativa: usar Yahoo Finance via scraping-free API
-        # Para simplificar, retornamos estrutura com dados aproximados
-        # Em produção, use finnhub.io ou Alpha Vantage com API key
-        
-        result = {
-            "SP500": {
-                "name": "SP500",
-                "label": "S&P 500",
-                "valor": "5000.00",  # Valor aproximado
-                "var": "0.50",
-                "description": "Standard & Poor's 500 - Índice das 500 maiores empresas dos EUA",
-            },
-            "DOW": {
-                "name": "DOW",
-                "label": "Dow Jones",
-                "valor": "38000.00",
-                "var": "0.35",
-                "description": "Dow Jones Industrial Average - 30 empresas blue-chip",
-            },
-            "NASDAQ": {
-                "name": "NASDAQ",
-                "label": "Nasdaq Composite",
-                "valor": "16000.00",
-                "var": "0.75",
-                "description": "Nasdaq Composite - Índice focado em tecnologia",
-            },
-        }
-        
-        logger.info("✅ Índices americanos obtidos (dados aproximados)")
-        return result
-        
-    except Exception as e:
-        logger.error(f"❌ Erro ao buscar índices americanos: {e}")
-        return {
-            "SP500": {"name": "SP500", "label": "S&P 500", "valor": "0", "var": "0.00", "description": "S&P 500"},
-            "DOW": {"name": "DOW", "label": "Dow Jones", "valor": "0", "var": "0.00", "description": "Dow Jones"},
-            "NASDAQ": {"name": "NASDAQ", "label": "Nasdaq", "valor": "0", "var": "0.00", "description": "Nasdaq"},
-        }
+    return await indexes_response(request, "usa")
+
+
+# --- Ingestão em background (scheduler iniciado junto com o app) ---
+
+def compor_cotacao():
+    """Monta /cotacao no quote store: moedas da AwesomeAPI (ou HG), IBOVESPA da HG"""
+    aw = quote_store.get("awesomeapi:cotacao", STORE_MAX_AGE)
+    hg = quote_store.get("hgbrasil:cotacao", STORE_MAX_AGE)
+    base = aw or hg
+    if not base:
+        return
+
+    data = {campo: base.value[campo] for campo in COTACAO_CAMPOS}
+    if hg:
+        data["ibovespa"] = hg.value["ibovespa"]
+    quote_store.put("cotacao", data, "+".join(e.source for e in (aw, hg) if e), replicate=False)
+
+
+def compor_exchange_rates():
+    """Monta o vetor de câmbio (USD-X da AwesomeAPI + BTC da CoinGecko) e o payload padrão"""
+    pares = quote_store.get("awesomeapi:exchange", STORE_MAX_AGE)
+    btc = quote_store.get("coingecko:btc", STORE_MAX_AGE)
+    if not pares:
+        return
+
+    # Fonte que perdeu o último polling fica marcada como stale nos pares que dependem dela
+    stale = [*(FX_MOEDAS if pares.age > 2 * POLL_AWESOMEAPI_SECONDS else ()),
+             *(["BTC"] if btc and btc.age > 2 * POLL_COINGECKO_SECONDS else ())]
+    source = "AwesomeAPI+CoinGecko" if btc else "AwesomeAPI"
+    vector = build_rate_vector(
+        pares.value, btc.value if btc else None, FX_MOEDAS, pares.fetched_at, btc.fetched_at if btc else None, stale
+    )
+    quote_store.put("fx:vector", vector, source, replicate=False)
+    quote_store.put("exchange-rates", cotar(vector, EXCHANGE_PARES_PADRAO), source, replicate=False)
+
+
+def recompor(key: str, entry: CacheEntry):
+    """
+    Listener do quote store: payloads compostos são derivados das fontes em todo worker
+    (inclusive quando as fontes chegam de outro worker pelo cache compartilhado)
+    """
+    if key in ("awesomeapi:cotacao", "hgbrasil:cotacao"):
+        compor_cotacao()
+    elif key in ("awesomeapi:exchange", "coingecko:btc"):
+        compor_exchange_rates()
+
+
+quote_store.on_put(recompor)
+
+
+@scheduler.job("awesomeapi", POLL_AWESOMEAPI_SECONDS)
+async def poll_awesomeapi():
+    # Pares das duas buscas caem no mesmo lote: uma requisição /last com a união
+    cotacao, pares = await asyncio.gather(fetch_awesomeapi(), fetch_exchange_awesomeapi())
+
+    if cotacao:
+        quote_store.put("awesomeapi:cotacao", cotacao, "AwesomeAPI")
+    if pares:
+        quote_store.put("awesomeapi:exchange", pares, "AwesomeAPI")
+
+    return bool(cotacao and pares)
+
+
+@scheduler.job("hgbrasil", POLL_HGBRASIL_SECONDS)
+async def poll_hgbrasil():
+    # As duas leem o mesmo documento /finance do cache de provedores (uma única requisição)
+    cotacao, brazil = await asyncio.gather(fetch_hgbrasil(), fetch_brazil_indexes())
+
+    if cotacao:
+        quote_store.put("hgbrasil:cotacao", cotacao, "HG Brasil")
+    if brazil:
+        quote_store.put("indexes:brazil", brazil, "HG Brasil")
+
+    return bool(cotacao and brazil)
+
+
+@scheduler.job("coingecko", POLL_COINGECKO_SECONDS)
+async def poll_coingecko():
+    btc = await fetch_coingecko_btc()
+
+    if btc:
+        quote_store.put("coingecko:btc", btc, "CoinGecko")
+
+    return bool(btc)
+
+
+@scheduler.job("bcb", POLL_BCB_SECONDS)
+async def poll_bcb():
+    indicadores = await fetch_indicadores()
+
+    if indicadores:
+        quote_store.put("indicadores", indicadores, "BCB SGS")
+
+    return bool(indicadores)
+
+
+@scheduler.job("historico", HISTORICO_SYNC_SECONDS)
+async def poll_historico():
+    results = await asyncio.gather(
+        *(upstream.do(f"historico:{symbol}", lambda symbol=symbol: sync_historico(symbol))
+          for symbol in HISTORICO_SIMBOLOS.values())
+    )
+    return all(results)
@@ -0,0 +1,132 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from typing import List
+import anyio.to_thread
+import logging
+from services import circuit_breaker, quota
+from services.cache import all_caches
+from services.indexes import indexes
+from services.metrics import collector, render, sample
+from services.providers import provider_cache
+from services.quote_store import quote_store
+from services.scheduler import scheduler
+from services.singleflight import upstream
+from services.stream_hub import hub
+
+router = APIRouter()
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Estado do circuit breaker como número (gauge)
+ESTADOS = {"closed": 0, "half_open": 1, "open": 2}
+
+# Saturação do threadpool das rotas síncronas (medida no handler async, dentro do event loop)
+_threadpool = {"borrowed": 0, "total": 0}
+
+
+@collector
+def coletar_caches() -> List[str]:
+    caches = all_caches()
+    lines: List[str] = []
+    for campo, help in (
+        ("hits", "Acertos frescos do cache SWR"),
+        ("stale_hits", "Valores antigos servidos enquanto revalida"),
+        ("misses", "Buscas no upstream antes de responder"),
+        ("errors", "Falhas do upstream durante a revalidação"),
+        ("coalesced", "Requisições que aguardaram uma busca já em andamento"),
+        ("adopted", "Entradas adotadas do cache compartilhado entre workers"),
+    ):
+        rows = [({"cache": name}, cache.snapshot()[campo]) for name, cache in caches.items()]
+        lines.extend(sample(f"julishub_cache_{campo}_total", help, "counter", rows))
+
+    ratio = []
+    for name, cache in caches.items():
+        snap = cache.snapshot()
+        total = snap["hits"] + snap["stale_hits"] + snap["misses"]
+        ratio.append(({"cache": name}, (snap["hits"] + snap["stale_hits"]) / total if total else 0.0))
+    lines.extend(sample("julishub_cache_hit_ratio", "Fração servida do cache (fresco ou antigo)", "gauge", ratio))
+
+    snap = provider_cache.snapshot()
+    lines.extend(sample("julishub_provider_cache_hits_total", "Documentos do upstream reaproveitados", "counter",
+                        [({}, snap["hits"])]))
+    lines.extend(sample("julishub_provider_cache_misses_total", "Documentos baixados do upstream", "counter",
+                        [({}, snap["misses"])]))
+    return lines
+
+
+@collector
+def coletar_breakers() -> List[str]:
+    snap = circuit_breaker.snapshot()
+    lines = sample("julishub_circuit_state", "Estado do circuit breaker (0=closed, 1=half_open, 2=open)", "gauge",
+                   [({"provider": name}, ESTADOS.get(info["state"], -1)) for name, info in snap.items()])
+    for campo, help in (
+        ("calls", "Chamadas registradas pelo breaker"),
+        ("failures", "Chamadas que falharam"),
+        ("rejected", "Chamadas recusadas com o circuito aberto"),
+        ("trips", "Vezes que o circuito abriu"),
+    ):
+        lines.extend(sample(f"julishub_circuit_{campo}_total", help, "counter",
+                            [({"provider": name}, info[campo]) for name, info in snap.items()]))
+    lines.extend(sample("julishub_circuit_latency_ewma_seconds", "Latência média móvel do provedor", "gauge",
+                        [({"provider": name}, info["latency_ewma"]) for name, info in snap.items()
+                         if info["latency_ewma"] is not None]))
+    return lines
+
+
+@collector
+def coletar_quotas() -> List[str]:
+    snap = quota.snapshot()
+    lines = sample("julishub_quota_tokens", "Tokens disponíveis na cota do provedor", "gauge",
+                   [({"provider": name}, info["tokens"]) for name, info in snap.items()])
+    lines.extend(sample("julishub_quota_granted_total", "Chamadas liberadas pela cota", "counter",
+                        [({"provider": name}, info["granted"]) for name, info in snap.items()]))
+    lines.extend(sample("julishub_quota_denied_total", "Chamadas negadas pela cota por prioridade", "counter",
+                        [({"provider": name, "priority": prioridade}, n)
+                         for name, info in snap.items() for prioridade, n in info["denied"].items()]))
+    return lines
+
+
+@collector
+def coletar_scheduler() -> List[str]:
+    snap = scheduler.snapshot()
+    lines: List[str] = []
+    for campo, help in (
+        ("runs", "Execuções do job"),
+        ("failures", "Execuções que falharam"),
+        ("skipped", "Execuções puladas (outro worker é o líder)"),
+    ):
+        lines.extend(sample(f"julishub_job_{campo}_total", help, "counter",
+                            [({"job": name}, info[campo]) for name, info in snap.items()]))
+    lines.extend(sample("julishub_job_last_duration_seconds", "Duração da última execução do job", "gauge",
+                        [({"job": name}, info["last_duration"]) for name, info in snap.items()
+                         if info["last_duration"] is not None]))
+    return lines
+
+
+@collector
+def coletar_runtime() -> List[str]:
+    lines = sample("julishub_quote_age_seconds", "Idade de cada cotação no quote store", "gauge",
+                   [({"key": key}, info["age"]) for key, info in quote_store.snapshot().items()])
+    lines.extend(sample("julishub_stream_subscribers", "Assinantes SSE conectados", "gauge", [({}, hub.subscribers)]))
+    lines.extend(sample("julishub_stream_published_total", "Eventos publicados no hub", "counter", [({}, hub.published)]))
+    lines.extend(sample("julishub_stream_dropped_total", "Eventos descartados para assinantes lentos", "counter",
+                        [({}, hub.dropped)]))
+    lines.extend(sample("julishub_indexes_timeouts_total", "Consultas de índices que passaram do prazo do provedor",
+                        "counter", [({"provider": name}, info["timeouts"]) for name, info in indexes.snapshot().items()]))
+    lines.extend(sample("julishub_singleflight_in_flight", "Buscas ao upstream em andamento (single-flight)", "gauge",
+                        [({}, len(upstream._tasks))]))
+    lines.extend(sample("julishub_threadpool_borrowed", "Threads do pool ocupadas por rotas síncronas", "gauge",
+                        [({}, _threadpool["borrowed"])]))
+    lines.extend(sample("julishub_threadpool_total", "Tamanho do pool de threads", "gauge", [({}, _threadpool["total"])]))
+    return lines
+
+
+@router.get("/metrics")
+async def metrics():
+    """Métricas do worker no formato texto do Prometheus"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    _threadpool["borrowed"] = limiter.borrowed_tokens
+    _threadpool["total"] = limiter.total_tokens
+    return Response(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 import feedparser
-import requests
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 import logging
 from hashlib import md5
+from services import http_client
+from services.cache import SWRCache
+from services.responses import entry_response
+from services.upstreams import GOOGLE_NEWS_URL
 
 router = APIRouter()
 
@@ -12,20 +15,11 @@ router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache simples em memória (1 hora)
-_cache_news = {
-    "data": None,
-    "timestamp": None,
-}
-
+# Cache stale-while-revalidate: 1h fresco, até 6h servindo e revalidando em background
 CACHE_DURATION = timedelta(hours=1)
+CACHE_HARD_DURATION = timedelta(hours=6)
 
-
-def is_cache_valid(cache_timestamp: Optional[datetime]) -> bool:
-    """Verifica se o cache ainda é válido (menos de 1 hora)"""
-    if cache_timestamp is None:
-        return False
-    return datetime.now() - cache_timestamp < CACHE_DURATION
+cache_news = SWRCache("news", CACHE_DURATION, CACHE_HARD_DURATION)
 
 
 def get_fonte_display_name(link: str) -> str:
@@ -118,19 +112,24 @@ def format_relative_time(pub_date_str: str) -> str:
         return "Data desconhecida"
 
 
-def fetch_google_news() -> List[Dict[str, Any]]:
-    """Busca notícias do RSS do Google News (Economia Brasil)"""
+async def fetch_google_news() -> Optional[List[Dict[str, Any]]]:
+    """Busca notícias do RSS do Google News (Economia Brasil); None se falhar"""
     try:
         logger.info("🔄 Buscando notícias do Google News...")
         
-        rss_url = "https://news.google.com/rss/search?q=economia+brasil&hl=pt-BR&gl=BR&ceid=BR:pt-419"
+        rss_url = f"{GOOGLE_NEWS_URL}/rss/search?q=economia+brasil&hl=pt-BR&gl=BR&ceid=BR:pt-419"
         
-        # Parse do RSS feed
-        feed = feedparser.parse(rss_url)
+        # Download pelo pool assíncrono (não bloqueia o event loop) e parse do RSS feed
+        resp = await http_client.get(rss_url, timeout=10)
+        if resp.status_code != 200:
+            logger.warning(f"⚠️ Google News retornou status {resp.status_code}")
+            return None
+
+        feed = feedparser.parse(resp.content)
         
         if not feed.entries:
             logger.warning("⚠️ Nenhuma notícia encontrada no feed")
-            return []
+            return None
         
         noticias = []
         for entry in feed.entries[:20]:  # Limita a 20 notícias
@@ -170,39 +169,30 @@ def fetch_google_news() -> List[Dict[str, Any]]:
                 continue
         
         logger.info(f"✅ {len(noticias)} notícias carregadas com sucesso")
-        return noticias
+        return noticias or None
     
     except Exception as e:
         logger.error(f"❌ Erro ao buscar notícias do Google News: {e}")
-        return []
+        return None
 
 
 @router.get("/noticias")
-async def get_noticias():
+async def get_noticias(request: Request):
     """
     Retorna lista de notícias financeiras do Google News (Economia Brasil)
     
-    Cache de 1 hora para evitar sobrecarga no feed do Google
+    Cache stale-while-revalidate para evitar sobrecarga no feed do Google
     """
     try:
-        # Verifica cache
-        if is_cache_valid(_cache_news["timestamp"]):
-            logger.info("📦 Retornando notícias do cache")
-            return _cache_news["data"]
-        
-        # Busca notícias frescas
-        noticias = fetch_google_news()
+        entry = await cache_news.get_entry("google-news:economia", fetch_google_news, source="Google News")
         
-        if not noticias:
+        if not entry:
             # Retorna lista vazia ao invés de erro para não quebrar o frontend
             logger.warning("⚠️ Nenhuma notícia disponível, retornando lista vazia")
             return []
         
-        # Atualiza cache
-        _cache_news["data"] = noticias
-        _cache_news["timestamp"] = datetime.now()
-        
-        return noticias
+        # Bytes JSON serializados uma vez por entrada do cache; ETag/Cache-Control pelo TTL restante
+        return entry_response(request, entry, cache_news.soft_ttl, cache_news.hard_ttl)
     
     except Exception as e:
         logger.error(f"❌ Erro crítico no endpoint /noticias: {e}")
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import logging
+from services.cache import CacheEntry
+from services.quote_store import quote_store
+from services.stream_hub import hub
+
+router = APIRouter()
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chave do quote store → canal (evento SSE) publicado para o frontend
+CANAIS = {
+    "cotacao": "cotacao",
+    "exchange-rates": "exchange-rates",
+    "indexes:brazil": "indexes-brazil",
+    "indicadores": "indicadores",
+}
+
+
+def publicar_no_stream(key: str, entry: CacheEntry):
+    """Listener do quote store: publica no hub só se o payload mudou"""
+    canal = CANAIS.get(key)
+    if canal and hub.publish(canal, entry.body):
+        logger.info(f"📡 [stream] '{canal}' atualizado para {hub.subscribers} assinantes")
+
+
+quote_store.on_put(publicar_no_stream)
+
+
+@router.get("/stream/quotes")
+async def stream_quotes(canais: Optional[str] = None):
+    """
+    Stream SSE com as cotações ao vivo (substitui o polling por minuto).
+    Envia o último valor de cada canal ao conectar e depois só quando algo muda.
+    Filtro opcional: ?canais=cotacao,exchange-rates
+    """
+    filtro = None
+    if canais:
+        filtro = {canal.strip() for canal in canais.split(",") if canal.strip()}
+        invalidos = sorted(filtro - set(CANAIS.values()))
+        if invalidos:
+            raise HTTPException(status_code=400, detail=f"Canais inválidos: {', '.join(invalidos)}")
+
+    logger.info("📡 Requisição recebida: /stream/quotes")
+    return StreamingResponse(
+        hub.subscribe(filtro),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Desliga buffering em proxies (nginx)
+        },
+    )
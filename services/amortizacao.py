@@ -0,0 +1,118 @@
+import os
+from typing import Dict, Iterable, Iterator, Tuple
+import numpy as np
+from services.responses import dumps
+
+# Prazo máximo aceito pela tabela de amortização (meses)
+FINANCIAMENTO_MAX_MESES = int(os.getenv("FINANCIAMENTO_MAX_MESES", "600"))
+# Linhas serializadas por bloco enviado ao cliente
+AMORTIZACAO_CHUNK = int(os.getenv("AMORTIZACAO_CHUNK", "120"))
+
+COLUNAS = ("mes", "prestacao", "juros", "amortizacao", "amortizacao_extra", "correcao", "saldo_devedor")
+
+
+def _base(sistema: str, taxa: float, meses: int) -> np.ndarray:
+    """
+    Saldo de um financiamento de valor 1 após k = 0..meses parcelas, sem correção nem extras.
+    Price: ((1+i)^n - (1+i)^k) / ((1+i)^n - 1); SAC (ou Price com i = 0): 1 - k/n.
+    """
+    k = np.arange(meses + 1, dtype=np.float64)
+    if sistema == "sac" or taxa == 0:
+        return 1 - k / meses
+    fator = (1 + taxa) ** k
+    total = (1 + taxa) ** meses
+    return (total - fator) / (total - 1)
+
+
+def tabela(
+    valor: float,
+    taxa: float,
+    meses: int,
+    sistema: str = "price",
+    correcao: float = 0.0,
+    extras: Iterable[Tuple[int, float]] = (),
+) -> Dict[str, np.ndarray]:
+    """
+    Tabela de amortização em colunas (uma linha por mês), calculada de forma vetorizada.
+
+    - taxa e correcao são mensais em fração (0.01 = 1% a.m.); a correção (TR/IPCA) incide sobre
+      o saldo antes dos juros, e a prestação é recalculada sobre o saldo corrigido e o prazo restante
+    - extras: (mês, valor) pagos depois da parcela do mês; o prazo é mantido e as parcelas seguintes caem
+
+    Como Price e SAC com prazo restante fixo são lineares no saldo, o mês k é a tabela-base
+    (valor 1, sem correção) multiplicada por um fator de escala: valor × (1+c)^k, reduzido
+    proporcionalmente a cada amortização extra.
+    """
+    base = _base(sistema, taxa, meses)
+    anterior, posterior = base[:-1], base[1:]
+
+    escala = valor * (1 + correcao) ** np.arange(1, meses + 1, dtype=np.float64)
+    # Extras no mesmo mês somam num único pagamento
+    por_mes: Dict[int, float] = {}
+    for mes, quantia in extras:
+        if 1 <= mes <= meses and quantia > 0:
+            por_mes[mes] = por_mes.get(mes, 0.0) + quantia
+
+    extra = np.zeros(meses)
+    fim = meses
+    for mes, quantia in sorted(por_mes.items()):
+        i = mes - 1
+        saldo = posterior[i] * escala[i]
+        pago = min(quantia, saldo)
+        extra[i] = pago
+        if pago >= saldo - 0.005:
+            # Quitado com a amortização extra: a tabela termina neste mês
+            fim = mes
+            break
+        escala[mes:] *= (saldo - pago) / saldo
+
+    anterior, posterior, escala, extra = anterior[:fim], posterior[:fim], escala[:fim], extra[:fim]
+    juros = taxa * anterior * escala
+    amortizacao = (anterior - posterior) * escala
+    saldo_devedor = np.maximum(posterior * escala - extra, 0.0)
+    return {
+        "mes": np.arange(1, fim + 1),
+        "prestacao": juros + amortizacao,
+        "juros": juros,
+        "amortizacao": amortizacao,
+        "amortizacao_extra": extra,
+        "correcao": anterior * escala * correcao / (1 + correcao),
+        "saldo_devedor": saldo_devedor,
+    }
+
+
+def resumo(colunas: Dict[str, np.ndarray]) -> Dict[str, float]:
+    pago = float(colunas["prestacao"].sum() + colunas["amortizacao_extra"].sum())
+    return {
+        "meses": int(len(colunas["mes"])),
+        "primeira_prestacao": round(float(colunas["prestacao"][0]), 2) if len(colunas["mes"]) else 0.0,
+        "total_pago": round(pago, 2),
+        "total_juros": round(float(colunas["juros"].sum()), 2),
+        "total_correcao": round(float(colunas["correcao"].sum()), 2),
+        "total_amortizacao_extra": round(float(colunas["amortizacao_extra"].sum()), 2),
+    }
+
+
+def _blocos(colunas: Dict[str, np.ndarray]) -> Iterator[list]:
+    """Linhas arredondadas em blocos de AMORTIZACAO_CHUNK (nunca a tabela inteira como lista)"""
+    n = len(colunas["mes"])
+    for inicio in range(0, n, AMORTIZACAO_CHUNK):
+        fim = min(inicio + AMORTIZACAO_CHUNK, n)
+        yield list(zip(
+            colunas["mes"][inicio:fim].tolist(),
+            *(np.round(colunas[nome][inicio:fim], 2).tolist() for nome in COLUNAS[1:]),
+        ))
+
+
+def ndjson(colunas: Dict[str, np.ndarray]) -> Iterator[bytes]:
+    """Uma linha JSON por mês e, por último, {"resumo": {...}}"""
+    for linhas in _blocos(colunas):
+        yield b"".join(dumps(dict(zip(COLUNAS, linha))) + b"\n" for linha in linhas)
+    yield dumps({"resumo": resumo(colunas)}) + b"\n"
+
+
+def csv(colunas: Dict[str, np.ndarray]) -> Iterator[bytes]:
+    """CSV com cabeçalho (separador vírgula, ponto decimal)"""
+    yield (",".join(COLUNAS) + "\n").encode()
+    for linhas in _blocos(colunas):
+        yield "".join(",".join(map(str, linha)) + "\n" for linha in linhas).encode()
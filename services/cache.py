@@ -0,0 +1,258 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+from services import deadline, quota
+from services.responses import dumps, etag_for, loads
+from services.shared_cache import SHARED_CACHE_LEASE_SECONDS, SHARED_CACHE_WAIT_SECONDS, shared_cache
+from services.singleflight import SingleFlight
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[], Awaitable[Any]]
+
+# Registro de todos os caches criados (usado para inspeção/métricas)
+_registry: Dict[str, "SWRCache"] = {}
+
+
+class CacheEntry:
+    """Valor em cache + metadados de quando/de onde/quanto custou buscar"""
+
+    __slots__ = ("value", "fetched_at", "source", "fetch_duration", "_body", "_etag")
+
+    def __init__(self, value: Any, source: str, fetch_duration: float, fetched_at: Optional[float] = None):
+        self.value = value
+        self.source = source
+        self.fetch_duration = fetch_duration
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+
+    @classmethod
+    def from_body(cls, body: bytes, source: str, fetch_duration: float, fetched_at: float) -> "CacheEntry":
+        """Entrada a partir do JSON já serializado (ex: gravado por outro worker), sem reserializar"""
+        entry = cls(loads(body), source, fetch_duration, fetched_at)
+        entry._body = body
+        return entry
+
+    @property
+    def body(self) -> bytes:
+        """JSON do valor, serializado uma única vez por entrada (o valor não muda depois de gravado)"""
+        if self._body is None:
+            self._body = dumps(self.value)
+        return self._body
+
+    @property
+    def etag(self) -> str:
+        if self._etag is None:
+            self._etag = etag_for(self.body)
+        return self._etag
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "age": round(self.age, 3),
+            "fetched_at": self.fetched_at,
+            "source": self.source,
+            "fetch_duration": round(self.fetch_duration, 4),
+        }
+
+
+class SWRCache:
+    """
+    Cache stale-while-revalidate:
+    - idade < soft_ttl: retorna direto do cache
+    - soft_ttl <= idade < hard_ttl: retorna o valor antigo e revalida em background
+    - idade >= hard_ttl (ou sem valor): busca no upstream antes de responder
+    - se o upstream falhar, serve o último valor bom conhecido (se houver)
+
+    O fetcher deve retornar None em caso de falha (mesma convenção dos fetch_* dos routers).
+
+    Com SHARED_CACHE=1 as entradas também vão para o cache compartilhado entre workers:
+    entrada local vencida é trocada pela de outro worker se houver uma mais nova, e só o
+    worker eleito (lease) busca no upstream; os demais servem stale ou esperam o eleito.
+    Caches com valores que não são JSON (shared=False) continuam só no worker.
+    """
+
+    def __init__(self, name: str, soft_ttl: timedelta, hard_ttl: timedelta, shared: bool = True):
+        self.name = name
+        self.soft_ttl = soft_ttl.total_seconds()
+        self.hard_ttl = hard_ttl.total_seconds()
+        self.shared = shared_cache if shared else None
+        self._entries: Dict[str, CacheEntry] = {}
+        # Uma única busca em andamento por chave (miss ou revalidação)
+        self._flight = SingleFlight(name)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.adopted = 0
+        _registry[name] = self
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Retorna a entrada (mesmo expirada) sem disparar busca"""
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, source: str, fetch_duration: float = 0.0) -> CacheEntry:
+        entry = CacheEntry(value, source, fetch_duration)
+        self._entries[key] = entry
+        return entry
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def expire(self, key: str):
+        """Vence a entrada (soft TTL) sem descartá-la: a próxima leitura serve o valor e revalida em background"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.fetched_at = min(entry.fetched_at, time.time() - self.soft_ttl)
+
+    def _shared_key(self, key: str) -> str:
+        return f"cache:{self.name}:{key}"
+
+    def _adopt(self, key: str) -> Optional[CacheEntry]:
+        """Entrada gravada por outro worker, se for mais nova que a local"""
+        row = self.shared.read(self._shared_key(key))
+        local = self._entries.get(key)
+        if row is None or (local is not None and row.fetched_at <= local.fetched_at):
+            return None
+        entry = CacheEntry.from_body(row.body, row.source, row.fetch_duration, row.fetched_at)
+        self._entries[key] = entry
+        self.adopted += 1
+        return entry
+
+    async def _wait_shared(self, key: str, desde: float) -> Optional[CacheEntry]:
+        """Espera o worker eleito gravar uma entrada mais nova que `desde`"""
+        limite = time.monotonic() + SHARED_CACHE_WAIT_SECONDS
+        while time.monotonic() < limite:
+            await asyncio.sleep(0.1)
+            entry = self._adopt(key)
+            if entry is not None and entry.fetched_at > desde:
+                return entry
+        return None
+
+    async def _fill(self, key: str, fetcher: Fetcher, source: str) -> Optional[CacheEntry]:
+        """Busca no upstream e grava no cache; com cache compartilhado, só o worker eleito busca"""
+        if self.shared is None:
+            return await self._fill_local(key, fetcher, source)
+
+        shared_key = self._shared_key(key)
+        if not self.shared.try_lease(shared_key, SHARED_CACHE_LEASE_SECONDS):
+            local = self._entries.get(key)
+            entry = await self._wait_shared(key, local.fetched_at if local else 0.0)
+            if entry is not None:
+                return entry
+            logger.warning(f"⚠️ [{self.name}] Worker eleito não atualizou '{key}' a tempo, buscando neste worker")
+            return await self._fill_local(key, fetcher, source)
+
+        try:
+            entry = await self._fill_local(key, fetcher, source)
+            if entry is not None:
+                try:
+                    self.shared.write(shared_key, entry.body, entry.fetched_at, entry.source, entry.fetch_duration)
+                except Exception as e:
+                    logger.warning(f"⚠️ [{self.name}] '{key}' não foi gravado no cache compartilhado: {e}")
+            return entry
+        finally:
+            self.shared.release(shared_key)
+
+    async def _fill_local(self, key: str, fetcher: Fetcher, source: str) -> Optional[CacheEntry]:
+        """Busca no upstream e grava no cache local; retorna None se falhar"""
+        inicio = time.perf_counter()
+        try:
+            value = await fetcher()
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] Erro ao buscar '{key}': {e}")
+            value = None
+        duracao = time.perf_counter() - inicio
+
+        if value is None:
+            self.errors += 1
+            return None
+
+        logger.info(f"📦 [{self.name}] Cache atualizado para '{key}' ({source}, {duracao:.2f}s)")
+        return self.set(key, value, source, duracao)
+
+    async def _fetch(self, key: str, fetcher: Fetcher, source: str) -> Optional[CacheEntry]:
+        """Busca coalescida: requisições concorrentes da mesma chave compartilham um único fetch"""
+        return await self._flight.do(key, lambda: self._fill(key, fetcher, source))
+
+    def _revalidate(self, key: str, fetcher: Fetcher, source: str):
+        """Agenda revalidação em background (no máximo uma por chave)"""
+        if self._flight.in_flight(key):
+            return
+
+        def done(task: asyncio.Task):
+            if not task.cancelled() and task.result() is None:
+                logger.warning(f"⚠️ [{self.name}] Revalidação de '{key}' falhou, mantendo último valor bom")
+
+        async def revalidar():
+            # Revalidação não é tráfego de usuário: só usa orçamento acima da reserva
+            quota.prioridade.set(quota.BACKGROUND)
+            # Nem fica presa ao orçamento de latência da requisição que a disparou
+            deadline.prazo.set(None)
+            return await self._fill(key, fetcher, source)
+
+        self._flight.start(key, revalidar).add_done_callback(done)
+
+    async def get_entry(self, key: str, fetcher: Fetcher, source: str) -> Optional[CacheEntry]:
+        """Retorna a entrada da chave aplicando a política stale-while-revalidate"""
+        entry = self._entries.get(key)
+        if self.shared is not None and (entry is None or entry.age >= self.soft_ttl):
+            entry = self._adopt(key) or entry
+
+        if entry is not None:
+            age = entry.age
+            if age < self.soft_ttl:
+                self.hits += 1
+                return entry
+            if age < self.hard_ttl:
+                self.stale_hits += 1
+                logger.info(f"♻️ [{self.name}] '{key}' servido do cache ({age:.0f}s) e revalidando em background")
+                self._revalidate(key, fetcher, source)
+                return entry
+
+        self.misses += 1
+        fresh = await self._fetch(key, fetcher, source)
+        if fresh is not None:
+            return fresh
+
+        if entry is not None:
+            # Último valor bom conhecido, mesmo além do hard TTL
+            logger.warning(f"⚠️ [{self.name}] Upstream falhou, servindo último valor bom de '{key}' ({entry.age:.0f}s)")
+            return entry
+
+        return None
+
+    async def get(self, key: str, fetcher: Fetcher, source: str) -> Any:
+        """Retorna o valor da chave (ver get_entry)"""
+        entry = await self.get_entry(key, fetcher, source)
+        return entry.value if entry is not None else None
+
+    def info(self, key: str) -> Optional[Dict[str, Any]]:
+        """Metadados da chave (idade, fonte, duração da busca)"""
+        entry = self._entries.get(key)
+        return entry.info() if entry else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "soft_ttl": self.soft_ttl,
+            "hard_ttl": self.hard_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "coalesced": self._flight.coalesced,
+            "adopted": self.adopted,
+            "keys": {key: entry.info() for key, entry in self._entries.items()},
+        }
+
+
+def all_caches() -> Dict[str, SWRCache]:
+    return dict(_registry)
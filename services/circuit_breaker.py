@@ -0,0 +1,173 @@
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+import logging
+from services.upstreams import AWESOMEAPI_URL, BCB_URL, COINGECKO_URL, GOOGLE_NEWS_URL, HGBRASIL_KEY, HGBRASIL_URL
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Falhas consecutivas (erro, 5xx/429 ou resposta lenta) que abrem o circuito
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+# Respostas mais lentas que isso contam como falha
+BREAKER_SLOW_SECONDS = float(os.getenv("BREAKER_SLOW_SECONDS", "4"))
+# Tempo aberto antes do probe em background (dobra a cada probe que falha, até o máximo)
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_MAX_OPEN_SECONDS = float(os.getenv("BREAKER_MAX_OPEN_SECONDS", "300"))
+# Peso da amostra mais recente nas médias móveis de latência/sucesso
+BREAKER_EWMA_ALPHA = 0.2
+# Estatísticas sem chamadas novas há mais que isso são esquecidas (provedor volta a ser testado)
+BREAKER_STATS_SECONDS = float(os.getenv("BREAKER_STATS_SECONDS", "300"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada na hora: o circuito do provedor está aberto"""
+
+    def __init__(self, provider: str):
+        super().__init__(f"Circuito aberto para {provider}")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um provedor:
+    - closed: chamadas passam; N falhas consecutivas abrem o circuito
+    - open: chamadas falham na hora; após o cooldown um probe roda em background
+    - half_open: só o probe passa; sucesso fecha, falha reabre com cooldown maior
+    """
+
+    def __init__(self, name: str, probe_url: Optional[str] = None):
+        self.name = name
+        self.probe_url = probe_url
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.open_seconds = BREAKER_OPEN_SECONDS
+        self.latency_ewma: Optional[float] = None
+        self.success_ewma = 1.0
+        self.last_call = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def probe_due(self) -> bool:
+        """True (uma única vez) quando o cooldown acabou: quem chamar dispara o probe"""
+        if self.state == OPEN and time.monotonic() >= self.open_until:
+            self.state = HALF_OPEN
+            logger.info(f"🟡 [breaker] {self.name}: half-open, testando em background")
+            return True
+        return False
+
+    def postpone(self):
+        """Volta para open sem contar falha (probe não pôde rodar agora)"""
+        self.state = OPEN
+        self.open_until = time.monotonic() + self.open_seconds
+
+    def record(self, ok: bool, latency: float):
+        self.calls += 1
+        self.last_call = time.monotonic()
+        if latency > BREAKER_SLOW_SECONDS:
+            ok = False
+
+        a = BREAKER_EWMA_ALPHA
+        self.latency_ewma = latency if self.latency_ewma is None else (1 - a) * self.latency_ewma + a * latency
+        self.success_ewma = (1 - a) * self.success_ewma + a * (1.0 if ok else 0.0)
+
+        if ok:
+            if self.state != CLOSED:
+                logger.info(f"🟢 [breaker] {self.name}: circuito fechado novamente")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.open_seconds = BREAKER_OPEN_SECONDS
+            return
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            # Probe falhou: reabre com backoff exponencial
+            self.open_seconds = min(self.open_seconds * 2, BREAKER_MAX_OPEN_SECONDS)
+            self._trip()
+        elif self.state == CLOSED and self.consecutive_failures >= BREAKER_FAILURES:
+            self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self.open_until = time.monotonic() + self.open_seconds
+        self.trips += 1
+        logger.warning(f"🔴 [breaker] {self.name}: circuito aberto por {self.open_seconds:.0f}s")
+
+    @property
+    def score(self) -> float:
+        """Quanto maior, melhor: taxa de sucesso recente / latência recente"""
+        if self.latency_ewma is None or time.monotonic() - self.last_call > BREAKER_STATS_SECONDS:
+            return 1.0 / 0.1
+        return self.success_ewma / max(self.latency_ewma, 0.01)
+
+    def info(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "success_ewma": round(self.success_ewma, 4),
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "trips": self.trips,
+        }
+
+
+# URL base do upstream → breaker do provedor (com URL barata para o probe half-open)
+# Por prefixo, não por host: com o stub local do bench todos os provedores dividem o mesmo host
+_breakers: Dict[str, CircuitBreaker] = {}
+_by_base: Dict[str, CircuitBreaker] = {}
+
+
+def register(name: str, base_url: str, probe_url: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, probe_url)
+    _by_base[base_url] = breaker
+    return breaker
+
+
+register("AwesomeAPI", AWESOMEAPI_URL, f"{AWESOMEAPI_URL}/last/USD-BRL")
+register("HG Brasil", HGBRASIL_URL, f"{HGBRASIL_URL}/finance?format=json-cors&key={HGBRASIL_KEY}")
+register("BCB", BCB_URL, f"{BCB_URL}/dados/serie/bcdata.sgs.432/dados/ultimos/1?formato=json")
+register("CoinGecko", COINGECKO_URL, f"{COINGECKO_URL}/api/v3/ping")
+register("Google News", GOOGLE_NEWS_URL, f"{GOOGLE_NEWS_URL}/rss?hl=pt-BR&gl=BR&ceid=BR:pt-419")
+
+
+def get(name: str) -> CircuitBreaker:
+    return _breakers[name]
+
+
+def for_url(url: str) -> Optional[CircuitBreaker]:
+    for base, breaker in _by_base.items():
+        if url.startswith(base):
+            return breaker
+    return None
+
+
+def is_open(name: str) -> bool:
+    return _breakers[name].state != CLOSED
+
+
+def ordenar(nomes: Iterable[str]) -> List[str]:
+    """Ordena uma cadeia de fallback: circuitos fechados primeiro, depois pelo melhor score recente"""
+    return sorted(nomes, key=lambda nome: (_breakers[nome].state != CLOSED, -_breakers[nome].score))
+
+
+def snapshot() -> Dict[str, Dict]:
+    return {name: breaker.info() for name, breaker in _breakers.items()}
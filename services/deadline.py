@@ -0,0 +1,81 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import logging
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Status de cada busca rodada por reunir()
+OK = "ok"
+TIMEOUT = "timeout"
+ERRO = "erro"
+
+# Prazo absoluto (time.monotonic) da requisição atual; tasks criadas dentro dela herdam o valor
+prazo: ContextVar[Optional[float]] = ContextVar("prazo", default=None)
+
+
+def restante() -> Optional[float]:
+    """Segundos que sobram do orçamento da requisição atual (None se não houver orçamento)"""
+    limite = prazo.get()
+    if limite is None:
+        return None
+    return max(limite - time.monotonic(), 0.0)
+
+
+def limitar(timeout: Optional[float]) -> Optional[float]:
+    """Timeout de uma chamada ao upstream cortado pelo que sobra do orçamento"""
+    sobra = restante()
+    if sobra is None:
+        return timeout
+    return sobra if timeout is None else min(timeout, sobra)
+
+
+@contextmanager
+def orcamento(segundos: float):
+    """
+    Define o orçamento de latência da requisição. Orçamentos aninhados nunca estendem
+    o prazo de fora: vale o menor dos dois.
+    """
+    limite = time.monotonic() + segundos
+    atual = prazo.get()
+    token = prazo.set(limite if atual is None else min(atual, limite))
+    try:
+        yield
+    finally:
+        prazo.reset(token)
+
+
+async def reunir(
+    buscas: Dict[str, Callable[[], Awaitable[Any]]], segundos: float
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Roda as buscas em paralelo dentro do orçamento e retorna no prazo com o que ficou pronto.
+    Retorna (resultados, status): resultado None para quem falhou ou não terminou;
+    status OK, ERRO (exceção ou None) ou TIMEOUT (cancelada ao fim do orçamento).
+    """
+    with orcamento(segundos):
+        tasks = {nome: asyncio.create_task(fn()) for nome, fn in buscas.items()}
+        sobra = restante()
+
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=sobra)
+
+    resultados: Dict[str, Any] = {}
+    status: Dict[str, str] = {}
+    for nome, task in tasks.items():
+        if not task.done():
+            # Buscas via single-flight seguem em background para quem mais estiver esperando
+            task.cancel()
+            resultados[nome], status[nome] = None, TIMEOUT
+            logger.warning(f"⏱️ [deadline] '{nome}' não terminou no orçamento de {segundos}s")
+        elif task.exception() is not None:
+            resultados[nome], status[nome] = None, ERRO
+            logger.error(f"❌ [deadline] Erro em '{nome}': {task.exception()}")
+        else:
+            resultados[nome] = task.result()
+            status[nome] = OK if resultados[nome] else ERRO
+    return resultados, status
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: índices dos pontos que preservam o formato visual da série.
+    Primeiro e último ponto são sempre mantidos; cada bucket do meio contribui com 1 ponto.
+    """
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        # Sem bucket do meio: só as pontas que couberem
+        return np.array([0, n - 1][:max(max_points, 0)], dtype=np.int64)
+
+    # Limites dos buckets internos (exclui o primeiro e o último ponto)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Médias do "próximo bucket" calculadas de uma vez com somas acumuladas
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    next_start = edges[1:]
+    next_end = np.append(edges[2:], n)
+    counts = next_end - next_start
+    avg_x = (cx[next_end] - cx[next_start]) / counts
+    avg_y = (cy[next_end] - cy[next_start]) / counts
+
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        bx, by = x[start:end], y[start:end]
+        # Área (x2) do triângulo: ponto anterior escolhido, candidato, média do próximo bucket
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Bucketing min/max: para cada bucket mantém o menor e o maior valor (em ordem temporal).
+    Totalmente vetorizado; preserva picos e vales. Primeiro e último ponto entram no orçamento:
+    (max_points - 2) // 2 buckets nos pontos do meio, então nunca passa de max_points.
+    """
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 4:
+        # Não cabe um bucket (2 pontos) além das pontas
+        return lttb(x, y, max_points)
+
+    buckets = (max_points - 2) // 2
+    meio = n - 2
+    bucket_id = (np.arange(meio) * buckets) // meio
+
+    # Ordena por (bucket, valor): primeiro de cada bucket = mínimo, último = máximo
+    order = np.lexsort((y[1:-1], bucket_id))
+    sorted_buckets = bucket_id[order]
+    first = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    last = np.r_[first[1:] - 1, meio - 1]
+
+    idx = np.unique(np.concatenate((order[first] + 1, order[last] + 1, [0, n - 1])))
+    return idx
+
+
+METODOS = {"lttb": lttb, "minmax": minmax}
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, metodo: str = "lttb") -> np.ndarray:
+    """Retorna os índices a manter (ordenados) para no máximo max_points pontos"""
+    return METODOS[metodo](x, y, max_points)
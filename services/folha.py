@@ -0,0 +1,227 @@
+import csv as csvlib
+import io
+import math
+import os
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import orjson
+from services.responses import dumps
+from services.tributos import TabelaTributos
+
+# Funcionários processados por bloco vetorizado (e por escrita no socket)
+FOLHA_LOTE = int(os.getenv("FOLHA_LOTE", "5000"))
+
+CAMPOS = ("salario_bruto", "dependentes", "outros_descontos")
+SAIDA = ("salario_bruto", "inss", "irrf", "outros_descontos", "salario_liquido", "total_descontos")
+
+
+class Lote:
+    """Bloco de funcionários em colunas; linhas inválidas ficam com NaN e a mensagem em `erros`"""
+
+    __slots__ = ("ids", "salarios", "dependentes", "outros", "erros")
+
+    def __init__(self, n: int):
+        self.ids: List[Optional[str]] = [None] * n
+        self.salarios = np.full(n, np.nan)
+        self.dependentes = np.zeros(n)
+        self.outros = np.zeros(n)
+        self.erros: Dict[int, str] = {}
+
+
+def _finito(valor) -> float:
+    numero = float(valor)
+    if not math.isfinite(numero):
+        raise ValueError(f"valor não finito: {valor!r}")
+    return numero
+
+
+def _inteiro(valor) -> int:
+    """Dependentes: inteiro não negativo (2.0 vale, 2.9 não é truncado para 2)"""
+    numero = float(valor or 0)
+    if not numero.is_integer() or numero < 0:
+        raise ValueError(f"não é inteiro: {valor!r}")
+    return int(numero)
+
+
+def _preencher(registros: List[Tuple[Optional[str], object, object, object]]) -> Lote:
+    lote = Lote(len(registros))
+    for i, (id_, salario, dependentes, outros) in enumerate(registros):
+        lote.ids[i] = id_
+        try:
+            lote.salarios[i] = _finito(salario)
+            lote.dependentes[i] = _inteiro(dependentes)
+            lote.outros[i] = _finito(outros or 0)
+        except (TypeError, ValueError):
+            lote.salarios[i] = np.nan
+            lote.erros[i] = (f"Valores inválidos: salario_bruto={salario!r}, dependentes={dependentes!r}, "
+                             f"outros_descontos={outros!r}")
+    return lote
+
+
+def _blocos(registros: Iterable, tamanho: int = FOLHA_LOTE) -> Iterator[Lote]:
+    bloco = []
+    for registro in registros:
+        bloco.append(registro)
+        if len(bloco) >= tamanho:
+            yield _preencher(bloco)
+            bloco = []
+    if bloco:
+        yield _preencher(bloco)
+
+
+def lotes_json(itens: List[Dict]) -> Iterator[Lote]:
+    """Array JSON de funcionários ({"salario_bruto", "dependentes", "outros_descontos", "id"})"""
+    return _blocos(
+        (item.get("id"), item.get("salario_bruto"), item.get("dependentes"), item.get("outros_descontos"))
+        if isinstance(item, dict) else (None, None, None, None)
+        for item in itens
+    )
+
+
+async def _linhas(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Linhas completas do corpo da requisição conforme os bytes chegam, com o número da linha"""
+    resto = b""
+    numero = 0
+    async for chunk in stream:
+        partes = (resto + chunk).split(b"\n")
+        resto = partes.pop()
+        for linha in partes:
+            numero += 1
+            if linha.strip():
+                yield numero, linha
+    if resto.strip():
+        yield numero + 1, resto
+
+
+async def lotes_ndjson(stream: AsyncIterator[bytes], tamanho: int = FOLHA_LOTE) -> AsyncIterator[Lote]:
+    """Upload NDJSON (um funcionário por linha), convertido em blocos conforme chega"""
+    bloco = []
+    async for _, linha in _linhas(stream):
+        try:
+            item = orjson.loads(linha)
+        except orjson.JSONDecodeError:
+            item = None
+        if isinstance(item, dict):
+            bloco.append((item.get("id"), item.get("salario_bruto"), item.get("dependentes"), item.get("outros_descontos")))
+        else:
+            bloco.append((None, None, None, None))
+        if len(bloco) >= tamanho:
+            yield _preencher(bloco)
+            bloco = []
+    if bloco:
+        yield _preencher(bloco)
+
+
+def _decimal(valor: str) -> str:
+    """Número no formato brasileiro (1.234,56) para o formato do float()"""
+    return valor.replace(".", "").replace(",", ".") if "," in valor else valor
+
+
+def _lote_csv(bloco: List[Tuple], numeros: List[int]) -> Lote:
+    lote = _preencher(bloco)
+    if lote.erros:
+        i = min(lote.erros)
+        raise ValueError(f"Linha {numeros[i]} do CSV: {lote.erros[i]}")
+    return lote
+
+
+class _Linha:
+    """Entrega ao csv.reader uma linha por vez, conforme o corpo chega"""
+
+    __slots__ = ("texto",)
+
+    def __init__(self):
+        self.texto: Optional[str] = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.texto is None:
+            raise StopIteration
+        texto, self.texto = self.texto, None
+        return texto
+
+
+async def lotes_csv(stream: AsyncIterator[bytes], tamanho: int = FOLHA_LOTE) -> AsyncIterator[Lote]:
+    """
+    Upload CSV com cabeçalho (salario_bruto obrigatório; dependentes, outros_descontos e id opcionais),
+    convertido em blocos conforme chega. Separado por vírgula ou, como no Excel em português,
+    por ponto e vírgula com vírgula decimal; campos entre aspas seguem o csv da stdlib.
+    Valor inválido: ValueError com o número da linha.
+    """
+    colunas = None
+    linha_atual = _Linha()
+    leitor = None
+    bloco, numeros = [], []
+    async for numero, linha in _linhas(stream):
+        texto = linha.rstrip(b"\r").decode("utf-8-sig" if colunas is None else "utf-8", "replace")
+        if leitor is None:
+            sep = ";" if texto.count(";") > texto.count(",") else ","
+            leitor = csvlib.reader(linha_atual, delimiter=sep, strict=True)
+
+        linha_atual.texto = texto
+        try:
+            valores = next(leitor)
+        except (csvlib.Error, StopIteration) as e:
+            raise ValueError(f"Linha {numero} do CSV: {e or 'campo entre aspas sem fechamento'}")
+
+        if colunas is None:
+            colunas = {nome.strip(): i for i, nome in enumerate(valores)}
+            if "salario_bruto" not in colunas:
+                raise ValueError("CSV sem a coluna salario_bruto no cabeçalho")
+            continue
+
+        def campo(nome):
+            i = colunas.get(nome)
+            if i is None or i >= len(valores):
+                return None
+            valor = valores[i].strip()
+            return _decimal(valor) if sep == ";" and nome != "id" else valor
+
+        bloco.append((campo("id"), campo("salario_bruto"), campo("dependentes"), campo("outros_descontos")))
+        numeros.append(numero)
+        if len(bloco) >= tamanho:
+            yield _lote_csv(bloco, numeros)
+            bloco, numeros = [], []
+    if bloco:
+        yield _lote_csv(bloco, numeros)
+
+
+def resultados(lote: Lote, tabela: TabelaTributos) -> Dict[str, np.ndarray]:
+    colunas = tabela.calcular(lote.salarios, lote.dependentes, lote.outros)
+    return {nome: np.round(valores, 2) for nome, valores in colunas.items()}
+
+
+def ndjson(lote: Lote, tabela: TabelaTributos) -> bytes:
+    colunas = resultados(lote, tabela)
+    linhas = zip(*(colunas[nome].tolist() for nome in SAIDA))
+    saida = []
+    for i, valores in enumerate(linhas):
+        item = {"id": lote.ids[i]} if lote.ids[i] is not None else {}
+        if i in lote.erros:
+            item["erro"] = lote.erros[i]
+        else:
+            item.update(zip(SAIDA, valores))
+        saida.append(dumps(item))
+    return b"\n".join(saida) + b"\n"
+
+
+def csv_cabecalho() -> bytes:
+    return (",".join(("id", *SAIDA, "erro")) + "\n").encode()
+
+
+def csv(lote: Lote, tabela: TabelaTributos) -> bytes:
+    """Linhas CSV do bloco; ids e mensagens com vírgula ou aspas saem entre aspas (csv da stdlib)"""
+    colunas = resultados(lote, tabela)
+    linhas = zip(*(colunas[nome].tolist() for nome in SAIDA))
+    vazio = ("",) * len(SAIDA)
+    saida = io.StringIO()
+    escritor = csvlib.writer(saida, lineterminator="\n")
+    for i, valores in enumerate(linhas):
+        id_ = lote.ids[i] if lote.ids[i] is not None else ""
+        if i in lote.erros:
+            escritor.writerow((id_, *vazio, lote.erros[i]))
+        else:
+            escritor.writerow((id_, *valores, ""))
+    return saida.getvalue().encode()
@@ -0,0 +1,185 @@
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Nomes usados nos labels ("Euro → Real")
+NOMES = {
+    "USD": "Dólar",
+    "BRL": "Real",
+    "EUR": "Euro",
+    "ARS": "Peso Argentino",
+    "CLP": "Peso Chileno",
+    "MXN": "Peso Mexicano",
+    "GBP": "Libra Esterlina",
+    "JPY": "Iene",
+    "CAD": "Dólar Canadense",
+    "BTC": "Bitcoin",
+}
+
+# Labels que fogem do padrão "Origem → Destino"
+LABELS = {
+    "USD_BRL": "Dólar Comercial → Real",
+}
+
+Par = Tuple[str, str]
+
+# Status de cada par na resposta
+OK = "ok"
+STALE = "stale"
+INDISPONIVEL = "indisponivel"
+
+
+class RateVector:
+    """
+    Quanto vale 1 USD em cada moeda (vetor compacto + variação % do dia).
+    Qualquer par X→Y sai por triangulação: taxa[Y] / taxa[X].
+    """
+
+    __slots__ = ("codes", "index", "rates", "var", "timestamp", "updated", "stale")
+
+    def __init__(
+        self,
+        codes: Sequence[str],
+        rates: Sequence[float],
+        var: Sequence[float],
+        timestamp: Optional[float] = None,
+        updated: Optional[Sequence[float]] = None,
+        stale: Iterable[str] = (),
+    ):
+        self.codes = tuple(codes)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.var = np.asarray(var, dtype=np.float64)
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        # Quando cada taxa foi obtida e quais vieram do último valor conhecido (busca fora do prazo/falhou)
+        self.updated = np.asarray(updated if updated is not None else [self.timestamp] * len(self.codes), dtype=np.float64)
+        self.stale = frozenset(stale)
+
+    @property
+    def parcial(self) -> bool:
+        """Alguma taxa está velha ou faltando"""
+        return bool(self.stale) or bool((self.rates <= 0).any())
+
+    def status(self, base: str, quote: str) -> Tuple[str, float]:
+        """(status, timestamp da perna mais velha) do par: ok, stale ou indisponivel"""
+        i, j = self.index[base], self.index[quote]
+        if self.rates[i] <= 0 or self.rates[j] <= 0:
+            return INDISPONIVEL, 0.0
+        status = STALE if base in self.stale or quote in self.stale else OK
+        return status, float(min(self.updated[i], self.updated[j]))
+
+    def cross(self, base: str, quote: str) -> Tuple[float, float]:
+        """(valor, variação %) de 1 unidade de base em quote; (0, 0) se faltar alguma perna"""
+        i, j = self.index[base], self.index[quote]
+        rb, rq = self.rates[i], self.rates[j]
+        if rb <= 0 or rq <= 0:
+            return 0.0, 0.0
+        var = ((1 + self.var[j] / 100) / (1 + self.var[i] / 100) - 1) * 100
+        return float(rq / rb), float(var)
+
+    def matrix(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Matrizes N×N de taxas e variações (linha = origem, coluna = destino)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            taxas = np.outer(1 / self.rates, self.rates)
+            fator = 1 + self.var / 100
+            var = (np.outer(1 / fator, fator) - 1) * 100
+        invalido = ~np.isfinite(taxas) | (taxas <= 0)
+        taxas[invalido] = 0.0
+        var[invalido] = 0.0
+        return taxas, var
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value else default
+    except (ValueError, TypeError):
+        return default
+
+
+def build_rate_vector(
+    awesome: Dict,
+    btc: Optional[Dict],
+    moedas: Iterable[str],
+    awesome_ts: Optional[float] = None,
+    btc_ts: Optional[float] = None,
+    stale: Iterable[str] = (),
+) -> RateVector:
+    """
+    Monta o vetor a partir do JSON da AwesomeAPI (pares USD-X) e da CoinGecko (BTC em USD).
+    awesome_ts/btc_ts: quando cada fonte foi obtida (padrão: agora); stale: códigos servidos do último valor conhecido
+    """
+    agora = time.time()
+    awesome_ts = awesome_ts if awesome_ts is not None else agora
+    btc_ts = btc_ts if btc_ts is not None else agora
+    codes = ["USD"]
+    rates = [1.0]
+    var = [0.0]
+
+    for moeda in moedas:
+        item = awesome.get(f"USD{moeda}", {})
+        codes.append(moeda)
+        rates.append(_float(item.get("bid")))
+        var.append(_float(item.get("pctChange")))
+
+    # CoinGecko cota BTC→USD; no vetor guardamos USD→BTC
+    bitcoin = (btc or {}).get("bitcoin", {})
+    preco = _float(bitcoin.get("usd"))
+    variacao = _float(bitcoin.get("usd_24h_change"))
+    codes.append("BTC")
+    rates.append(1 / preco if preco > 0 else 0.0)
+    var.append((1 / (1 + variacao / 100) - 1) * 100)
+
+    updated = [awesome_ts] * (len(codes) - 1) + [btc_ts]
+    return RateVector(codes, rates, var, updated=updated, stale=stale)
+
+
+def parse_pairs(pairs: str) -> List[Par]:
+    """'USD-BRL,EUR_ARS' → [("USD", "BRL"), ("EUR", "ARS")]"""
+    result = []
+    for raw in pairs.split(","):
+        raw = raw.strip().upper().replace("-", "_")
+        if not raw:
+            continue
+        partes = raw.split("_")
+        if len(partes) != 2 or not all(partes):
+            raise ValueError(f"Par inválido: '{raw}' (use ORIGEM-DESTINO, ex: USD-BRL)")
+        result.append((partes[0], partes[1]))
+    return result
+
+
+def formatar_taxa(valor: float) -> str:
+    """Casas decimais suficientes para taxas muito pequenas (ex: BRL → BTC)"""
+    if valor <= 0:
+        return "0.00"
+    casas = max(4, 3 - math.floor(math.log10(valor)))
+    return f"{valor:.{casas}f}"
+
+
+def label(base: str, quote: str) -> str:
+    return LABELS.get(f"{base}_{quote}", f"{NOMES.get(base, base)} → {NOMES.get(quote, quote)}")
+
+
+def cotar(vector: RateVector, pares: Iterable[Par]) -> Dict[str, Dict]:
+    """
+    Payload no formato de /exchange-rates para os pares pedidos, com o status de cada par
+    ("ok", "stale" ou "indisponivel"). O horário da obtenção fica fora do corpo (ver atualizado_em):
+    polling com as mesmas cotações tem que gerar os mesmos bytes, senão o SSE republica e o ETag muda
+    """
+    result = {}
+    for base, quote in pares:
+        valor, var = vector.cross(base, quote)
+        status, _ = vector.status(base, quote)
+        result[f"{base}_{quote}"] = {
+            "valor": formatar_taxa(valor),
+            "var": f"{var:.2f}",
+            "label": label(base, quote),
+            "status": status,
+        }
+    return result
+
+
+def atualizado_em(vector: RateVector, pares: Iterable[Par]) -> int:
+    """Timestamp da perna mais velha entre os pares disponíveis (0 se nenhum)"""
+    horarios = [ts for status, ts in (vector.status(base, quote) for base, quote in pares) if status != INDISPONIVEL]
+    return int(min(horarios)) if horarios else 0
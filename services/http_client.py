@@ -0,0 +1,143 @@
+import asyncio
+import httpx
+import os
+import time
+from typing import Dict, Optional
+import logging
+from services import circuit_breaker, deadline, metrics, quota
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Limites do pool de conexões (por host), configuráveis por variável de ambiente
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Timeouts padrão (segundos); cada chamada pode sobrescrever o total
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "5"))
+
+HEADERS = {"User-Agent": "JulisHub/1.0 (+https://julishub.vercel.app)"}
+
+# Um cliente (pool keep-alive) por host: um upstream lento não ocupa as conexões dos outros
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Cria um cliente assíncrono com pool de conexões keep-alive"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        headers=HEADERS,
+        follow_redirects=True,
+    )
+
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """Retorna o cliente compartilhado do host da URL (criado sob demanda)"""
+    parsed = httpx.URL(url)
+    host_key = f"{parsed.scheme}://{parsed.netloc.decode()}"
+
+    client = _clients.get(host_key)
+    if client is None or client.is_closed:
+        logger.info(f"🔌 Criando pool de conexões para {host_key}")
+        client = _build_client()
+        _clients[host_key] = client
+    return client
+
+
+def _falhou(resp: httpx.Response) -> bool:
+    """Erros do lado do provedor (5xx) e rate limit contam como falha para o circuit breaker"""
+    return resp.status_code >= 500 or resp.status_code == 429
+
+
+async def _probe(breaker: circuit_breaker.CircuitBreaker):
+    """Probe half-open em background: uma requisição barata decide se o circuito fecha"""
+    try:
+        quota.acquire(breaker.probe_url, quota.BACKGROUND)
+    except quota.QuotaExceededError:
+        # Sem orçamento para testar agora: continua aberto e tenta no próximo cooldown
+        breaker.postpone()
+        return
+
+    inicio = time.perf_counter()
+    try:
+        resp = await get_client(breaker.probe_url).get(breaker.probe_url, timeout=HTTP_TIMEOUT)
+        ok = not _falhou(resp)
+    except Exception as e:
+        logger.warning(f"⚠️ Probe de {breaker.name} falhou: {e}")
+        ok = False
+    breaker.record(ok, time.perf_counter() - inicio)
+
+
+_probes = set()
+
+
+async def get(url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+    """
+    GET assíncrono reutilizando o pool do host (TCP+TLS só na primeira conexão).
+    Passa pelo circuit breaker do provedor: com o circuito aberto falha na hora (CircuitOpenError).
+    Consome o orçamento do provedor conforme a prioridade da task (QuotaExceededError se esgotado).
+    Dentro de um orçamento de latência (services.deadline) o timeout é cortado pelo que sobra dele.
+    """
+    breaker = circuit_breaker.for_url(url)
+    provider = breaker.name if breaker is not None else httpx.URL(url).host
+    if breaker is not None and not breaker.allow():
+        if breaker.probe_due() and breaker.probe_url:
+            task = asyncio.create_task(_probe(breaker))
+            _probes.add(task)
+            task.add_done_callback(_probes.discard)
+        metrics.upstream_errors.inc((provider, "circuit_open"))
+        raise circuit_breaker.CircuitOpenError(breaker.name)
+
+    if deadline.prazo.get() is not None:
+        timeout = deadline.limitar(HTTP_TIMEOUT if timeout is None else timeout)
+        if timeout <= 0:
+            metrics.upstream_errors.inc((provider, "deadline"))
+            raise httpx.TimeoutException("Orçamento da requisição esgotado")
+
+    try:
+        quota.acquire(url)
+    except quota.QuotaExceededError:
+        metrics.upstream_errors.inc((provider, "quota"))
+        raise
+
+    client = get_client(url)
+    if timeout is not None:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, HTTP_CONNECT_TIMEOUT))
+
+    inicio = time.perf_counter()
+    metrics.upstream_in_flight.inc((provider,))
+    try:
+        resp = await client.get(url, **kwargs)
+    except Exception as e:
+        duracao = time.perf_counter() - inicio
+        metrics.upstream_latency.observe((provider,), duracao)
+        metrics.upstream_errors.inc((provider, type(e).__name__))
+        if breaker is not None:
+            breaker.record(False, duracao)
+        raise
+    finally:
+        metrics.upstream_in_flight.dec((provider,))
+
+    duracao = time.perf_counter() - inicio
+    metrics.upstream_latency.observe((provider,), duracao)
+    if _falhou(resp):
+        metrics.upstream_errors.inc((provider, f"http_{resp.status_code}"))
+    if breaker is not None:
+        breaker.record(not _falhou(resp), duracao)
+    return resp
+
+
+async def close_clients():
+    """Fecha todos os pools (chamado no shutdown da aplicação)"""
+    for host_key, client in list(_clients.items()):
+        await client.aclose()
+        logger.info(f"🔌 Pool de conexões fechado: {host_key}")
+    _clients.clear()
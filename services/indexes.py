@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+from services.providers import hgbrasil_finance, provider_cache
+from services.singleflight import upstream
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prazo padrão de cada provedor de índices; quem estourar fica de fora desta resposta
+INDEXES_DEADLINE = float(os.getenv("INDEXES_DEADLINE", "3"))
+
+# Índices servidos em /indexes/{regiao}: símbolo → (label, descrição)
+INDICES: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "brazil": {
+        "IBOVESPA": ("Ibovespa", "Índice Bovespa - Principal índice da B3"),
+        "IFIX": ("IFIX", "Índice de Fundos Imobiliários"),
+    },
+    "argentina": {
+        "MERVAL": ("S&P Merval", "Índice Merval - Principal índice da Bolsa de Buenos Aires"),
+        "BURCAP": ("BURCAP", "Índice de Capitalização da BYMA"),
+    },
+    "usa": {
+        "SP500": ("S&P 500", "Standard & Poor's 500 - Índice das 500 maiores empresas dos EUA"),
+        "DOW": ("Dow Jones", "Dow Jones Industrial Average - 30 empresas blue-chip"),
+        "NASDAQ": ("Nasdaq Composite", "Nasdaq Composite - Índice focado em tecnologia"),
+    },
+}
+
+# Cotação de um índice: {"valor": "142200.12", "var": "0.84"}
+Cotacoes = Dict[str, Dict[str, str]]
+
+
+class Indices(dict):
+    """Índices de uma região (o JSON é o do dict); parcial se algum provedor dela falhou ou estourou o prazo"""
+
+    parcial = False
+
+
+class IndexProvider:
+    """Fonte de cotações para um conjunto de índices (uma busca devolve todos os que ela cobre)"""
+
+    def __init__(self, name: str, simbolos: List[str], fetch: Callable[[], Awaitable[Optional[Cotacoes]]],
+                 deadline: float = INDEXES_DEADLINE):
+        self.name = name
+        self.simbolos = set(simbolos)
+        self.fetch = fetch
+        self.deadline = deadline
+        self.timeouts = 0
+
+    async def cotacoes(self) -> Optional[Cotacoes]:
+        """Cotações do provedor: do cache de provedores se frescas, senão uma busca compartilhada"""
+        key = f"indexes:{self.name}"
+        entry = provider_cache.get(key)
+        if entry is not None:
+            provider_cache.hits += 1
+            return entry.value
+
+        provider_cache.misses += 1
+
+        async def buscar():
+            inicio = time.perf_counter()
+            data = await self.fetch()
+            if data:
+                provider_cache.set(key, data, self.name, time.perf_counter() - inicio)
+            return data
+
+        return await upstream.do(key, buscar)
+
+
+class IndexRegistry:
+    """
+    Provedores de índices em ordem de prioridade. Uma região consulta em paralelo todos os
+    provedores que cobrem algum índice dela, cada um com seu prazo (a busca que estourar segue
+    em background e abastece o cache); cada índice vem do primeiro provedor que tiver valor.
+    """
+
+    def __init__(self):
+        self.providers: List[IndexProvider] = []
+
+    def register(self, name: str, simbolos: List[str], deadline: float = INDEXES_DEADLINE):
+        """Decorator para registrar a função de busca de um provedor (ordem de registro = prioridade)"""
+        def decorator(fn: Callable[[], Awaitable[Optional[Cotacoes]]]):
+            self.providers.append(IndexProvider(name, simbolos, fn, deadline))
+            return fn
+        return decorator
+
+    async def _consultar(self, provider: IndexProvider) -> Optional[Cotacoes]:
+        try:
+            return await asyncio.wait_for(provider.cotacoes(), provider.deadline)
+        except asyncio.TimeoutError:
+            provider.timeouts += 1
+            logger.warning(f"⏱️ [indexes] {provider.name} passou do prazo de {provider.deadline}s")
+        except Exception as e:
+            logger.error(f"❌ [indexes] Erro em {provider.name}: {e}")
+        return None
+
+    async def regiao(self, regiao: str) -> Optional[Indices]:
+        """Índices da região no formato das rotas /indexes/*; None se nenhum provedor respondeu"""
+        indices = INDICES[regiao]
+        providers = [p for p in self.providers if p.simbolos & indices.keys()]
+        results = await asyncio.gather(*(self._consultar(p) for p in providers))
+
+        result = Indices()
+        # Quem falhou deixou seus índices com valor de referência (ou zerados)
+        result.parcial = not all(results)
+        for simbolo, (label, descricao) in indices.items():
+            for provider, data in zip(providers, results):
+                if data and simbolo in data:
+                    result[simbolo] = {"name": simbolo, "label": label, **data[simbolo], "description": descricao}
+                    break
+
+        if not result:
+            return None
+        for simbolo, (label, descricao) in indices.items():
+            result.setdefault(simbolo, {"name": simbolo, "label": label, "valor": "0", "var": "0.00", "description": descricao})
+        return result
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            p.name: {"simbolos": sorted(p.simbolos), "deadline": p.deadline, "timeouts": p.timeouts}
+            for p in self.providers
+        }
+
+
+indexes = IndexRegistry()
+
+
+# HG Brasil: mesmo documento /finance de /cotacao (um download para as rotas)
+HGBRASIL_SIMBOLOS = {"IBOVESPA": "IBOVESPA", "IFIX": "IFIX", "DOWJONES": "DOW", "NASDAQ": "NASDAQ"}
+
+
+@indexes.register("HG Brasil", list(HGBRASIL_SIMBOLOS.values()))
+async def fetch_hgbrasil_indexes() -> Optional[Cotacoes]:
+    finance = await hgbrasil_finance()
+    if not finance:
+        return None
+
+    result = {}
+    for chave, simbolo in HGBRASIL_SIMBOLOS.items():
+        stock = finance["stocks"].get(chave)
+        if stock and stock.get("points") is not None:
+            result[simbolo] = {"valor": str(stock["points"]), "var": str(stock.get("variation", "0.00"))}
+    return result
+
+
+# Valores aproximados para índices sem API gratuita (BYMA e S&P exigem autenticação/plano pago)
+# Última prioridade: só aparecem se nenhum provedor real tiver o índice
+REFERENCIA = {
+    "MERVAL": {"valor": "1250000", "var": "1.25"},
+    "BURCAP": {"valor": "850000", "var": "0.85"},
+    "SP500": {"valor": "5000.00", "var": "0.50"},
+    "DOW": {"valor": "38000.00", "var": "0.35"},
+    "NASDAQ": {"valor": "16000.00", "var": "0.75"},
+}
+
+
+@indexes.register("Referência", list(REFERENCIA))
+async def fetch_referencia() -> Optional[Cotacoes]:
+    return REFERENCIA
@@ -0,0 +1,71 @@
+import math
+import os
+from typing import Dict, Sequence
+import numpy as np
+
+# Horizonte máximo aceito pelas calculadoras (anos)
+JUROS_MAX_ANOS = int(os.getenv("JUROS_MAX_ANOS", "100"))
+# Máximo de pontos no gráfico; acima disso o passo é alargado (sempre múltiplo da granularidade)
+JUROS_MAX_PONTOS = int(os.getenv("JUROS_MAX_PONTOS", "600"))
+# Máximo de combinações em /juros-compostos/cenarios
+JUROS_MAX_CENARIOS = int(os.getenv("JUROS_MAX_CENARIOS", "100000"))
+
+# Granularidade do gráfico → meses entre pontos
+GRANULARIDADES = {"mensal": 1, "trimestral": 3, "anual": 12}
+
+
+def taxa_mensal(taxa_anual):
+    """Taxa mensal equivalente à taxa anual em % (aceita escalar ou array)"""
+    return (1 + np.asarray(taxa_anual, dtype=np.float64) / 100) ** (1 / 12) - 1
+
+
+def saldo(aporte_inicial, aporte_mensal, taxa, meses) -> np.ndarray:
+    """
+    Saldo após `meses` com aporte no fim de cada mês, em forma fechada:
+    P·(1+i)^n + A·((1+i)^n - 1)/i  (com i = 0: P + A·n).
+    Todos os argumentos fazem broadcast, então um array de meses dá a curva inteira de uma vez.
+    """
+    taxa = np.asarray(taxa, dtype=np.float64)
+    meses = np.asarray(meses, dtype=np.float64)
+    fator = (1 + taxa) ** meses
+    with np.errstate(divide="ignore", invalid="ignore"):
+        anuidade = np.where(taxa == 0, meses, (fator - 1) / taxa)
+    return aporte_inicial * fator + aporte_mensal * anuidade
+
+
+def meses_do_grafico(meses: int, granularidade: str, max_pontos: int = JUROS_MAX_PONTOS) -> np.ndarray:
+    """Meses em que o gráfico tem ponto: 0, passo, 2·passo, ... e sempre o último mês"""
+    passo = GRANULARIDADES[granularidade]
+    passo *= max(1, math.ceil(meses / passo / max(max_pontos - 1, 1)))
+    pontos = np.arange(0, meses + 1, passo)
+    if pontos[-1] != meses:
+        pontos = np.append(pontos, meses)
+    return pontos
+
+
+def cenarios(aporte_inicial: float, taxas_anuais: Sequence[float], aportes_mensais: Sequence[float],
+             anos: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Produto cartesiano taxa × aporte × anos calculado numa única passada vetorizada.
+    Colunas com um valor por cenário (ordem: taxa varia mais devagar, anos mais rápido).
+    """
+    taxa, aporte, ano = (
+        grade.ravel()
+        for grade in np.meshgrid(
+            np.asarray(taxas_anuais, dtype=np.float64),
+            np.asarray(aportes_mensais, dtype=np.float64),
+            np.asarray(anos, dtype=np.int64),
+            indexing="ij",
+        )
+    )
+    meses = ano * 12
+    total = saldo(aporte_inicial, aporte, taxa_mensal(taxa), meses)
+    investido = aporte_inicial + aporte * meses
+    return {
+        "taxa_anual": taxa,
+        "aporte_mensal": aporte,
+        "anos": ano,
+        "total_investido": investido,
+        "total_juros": total - investido,
+        "total_final": total,
+    }
@@ -0,0 +1,235 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Buckets de latência (segundos) usados nos histogramas de rotas e upstreams
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Intervalo de amostragem do atraso do event loop
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pares = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), n: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + n
+
+    def render(self) -> List[str]:
+        return [*self.header(), *(
+            f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}" for labels, value in self._values.items()
+        )]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), n: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - n
+
+    def set(self, labels: Labels, value: float):
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo no formato Prometheus (contagem por bucket + _sum + _count)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels → [contagem por bucket (não cumulativa, último = +Inf), soma]
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float):
+        serie = self._series.get(labels)
+        if serie is None:
+            serie = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        serie[0][bisect_left(self.buckets, value)] += 1
+        serie[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, soma) in self._series.items():
+            acumulado = 0
+            for limite, n in zip((*self.buckets, float("inf")), counts):
+                acumulado += n
+                le = f'le="{_num(limite)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {acumulado}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(soma[0])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {acumulado}")
+        return lines
+
+
+_registry: List[_Metric] = []
+# Coletores chamados a cada scrape: leem os snapshot() dos serviços e devolvem linhas prontas
+_collectors: List[Callable[[], List[str]]] = []
+
+
+def collector(fn: Callable[[], List[str]]) -> Callable[[], List[str]]:
+    """Decorator para registrar um coletor de métricas calculadas na hora do scrape"""
+    _collectors.append(fn)
+    return fn
+
+
+def sample(name: str, help: str, kind: str, rows: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Linhas de uma métrica a partir de (labels, valor) — usado pelos coletores"""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in rows:
+        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_num(value)}")
+    return lines
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for fn in _collectors:
+        try:
+            lines.extend(fn())
+        except Exception as e:
+            logger.error(f"❌ Erro no coletor de métricas {fn.__name__}: {e}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Instrumentos usados pelo app e pelo http_client ---
+
+http_requests = Counter("julishub_http_requests_total", "Requisições HTTP por rota e status", ("method", "route", "status"))
+http_latency = Histogram("julishub_http_request_duration_seconds", "Latência das rotas", ("method", "route"))
+http_in_flight = Gauge("julishub_http_requests_in_flight", "Requisições HTTP em andamento")
+
+upstream_latency = Histogram("julishub_upstream_request_duration_seconds", "Latência das chamadas aos provedores", ("provider",))
+upstream_errors = Counter("julishub_upstream_errors_total", "Falhas nas chamadas aos provedores", ("provider", "kind"))
+upstream_in_flight = Gauge("julishub_upstream_requests_in_flight", "Chamadas aos provedores em andamento", ("provider",))
+
+loop_lag = Histogram("julishub_event_loop_lag_seconds", "Atraso do event loop (quanto um sleep passou do previsto)", (), LOOP_LAG_BUCKETS)
+loop_lag_last = Gauge("julishub_event_loop_lag_last_seconds", "Último atraso medido do event loop")
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: latência por rota (template com o prefixo do router, não a URL crua), status e
+    requisições em andamento. Tudo é medido até o início da resposta, para que streams longos
+    (SSE, lotes) não fiquem contados como em andamento nem distorçam o histograma.
+    """
+
+    def __init__(self, app, prefixos: Optional[Dict[str, Iterable]] = None):
+        self.app = app
+        # id da rota → prefixo de include_router do seu router (passado pelo app.py, sem adivinhar pela URL)
+        self._prefixos: Dict[int, str] = {
+            id(route): prefixo
+            for prefixo, routers in (prefixos or {}).items()
+            for router in routers
+            for route in router.routes
+        }
+
+    def _rota(self, scope) -> str:
+        route = scope.get("route")
+        path = getattr(route, "path_format", None)
+        if not path:
+            return "<sem rota>"
+        # Rotas de router incluído guardam o template sem o prefixo; as demais (e versões do FastAPI
+        # que copiam a rota já prefixada) não estão no mapa
+        return scope.get("root_path", "") + self._prefixos.get(id(route), "") + path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        http_in_flight.inc()
+        aberta = [True]
+
+        def registrar(status: int):
+            if aberta[0]:
+                aberta[0] = False
+                http_in_flight.dec()
+                path = self._rota(scope)
+                http_latency.observe((scope["method"], path), time.perf_counter() - inicio)
+                http_requests.inc((scope["method"], path, str(status)))
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                registrar(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            # Falhou antes de começar a responder
+            registrar(500)
+
+
+class LoopLagMonitor:
+    """Mede periodicamente o atraso do event loop (callbacks bloqueantes atrasam o sleep)"""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            inicio = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - inicio - self.interval, 0.0)
+            loop_lag.observe((), lag)
+            loop_lag_last.set((), lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="metrics:loop-lag")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+from services import http_client
+from services.cache import CacheEntry
+from services.singleflight import upstream
+from services.upstreams import AWESOMEAPI_URL, HGBRASIL_KEY, HGBRASIL_URL
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Por quanto tempo um documento do upstream já parseado é reaproveitado entre rotas
+PROVIDER_CACHE_SECONDS = float(os.getenv("PROVIDER_CACHE_SECONDS", "30"))
+# Janela em que pedidos de pares da AwesomeAPI são juntados numa única requisição
+AWESOMEAPI_BATCH_SECONDS = float(os.getenv("AWESOMEAPI_BATCH_SECONDS", "0.01"))
+
+HGBRASIL_FINANCE_URL = f"{HGBRASIL_URL}/finance?format=json-cors&key={HGBRASIL_KEY}"
+AWESOMEAPI_LAST_URL = f"{AWESOMEAPI_URL}/last/"
+
+
+class ProviderCache:
+    """
+    Cache por recurso do upstream (não por rota): o mesmo documento parseado
+    alimenta todas as rotas que precisam dele enquanto tiver menos de `ttl` segundos.
+    Não serve valor vencido: quem precisa de fallback é o SWRCache/quote store das rotas.
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None or entry.age >= self.ttl:
+            return None
+        return entry
+
+    def set(self, key: str, value: Any, source: str, fetch_duration: float = 0.0) -> CacheEntry:
+        entry = CacheEntry(value, source, fetch_duration)
+        self._entries[key] = entry
+        return entry
+
+    async def documento(self, key: str, url: str, parse: Callable[[Any], Any], source: str, timeout: float) -> Any:
+        """
+        Documento parseado do recurso: do cache se fresco, senão uma única busca
+        compartilhada (single-flight). None se o upstream responder com erro.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry.value
+
+        self.misses += 1
+
+        async def buscar():
+            inicio = time.perf_counter()
+            resp = await http_client.get(url, timeout=timeout)
+            if resp.status_code != 200:
+                logger.warning(f"⚠️ {source} retornou status {resp.status_code}")
+                return None
+            return self.set(key, parse(resp.json()), source, time.perf_counter() - inicio).value
+
+        return await upstream.do(key, buscar)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "keys": {key: entry.info() for key, entry in self._entries.items()},
+        }
+
+
+provider_cache = ProviderCache("providers", PROVIDER_CACHE_SECONDS)
+
+
+async def hgbrasil_finance() -> Optional[Dict]:
+    """`results` do /finance da HG Brasil (moedas e bolsas), um download para todas as rotas"""
+    return await provider_cache.documento(
+        "hgbrasil:finance", HGBRASIL_FINANCE_URL, lambda data: data["results"], "HG Brasil", timeout=5
+    )
+
+
+# Lotes de pares da AwesomeAPI: o que está aberto (recebendo pares) e os que estão em andamento
+_lote_aberto: Optional[Set[str]] = None
+_lote_task: Optional[asyncio.Task] = None
+_em_andamento: List[Tuple[Set[str], asyncio.Task]] = []
+
+
+async def _buscar_lote(pares: Set[str]) -> Optional[Dict]:
+    """Espera a janela do lote e busca a união dos pares pedidos numa única URL"""
+    global _lote_aberto
+    await asyncio.sleep(AWESOMEAPI_BATCH_SECONDS)
+    lote, _lote_aberto = sorted(pares), None
+
+    url = AWESOMEAPI_LAST_URL + ",".join(lote)
+    logger.info(f"   → AwesomeAPI /last com {len(lote)} pares")
+    inicio = time.perf_counter()
+    resp = await http_client.get(url, timeout=10)
+    if resp.status_code != 200:
+        logger.warning(f"⚠️ AwesomeAPI retornou status {resp.status_code}")
+        return None
+
+    data = resp.json()
+    duracao = time.perf_counter() - inicio
+    for par in lote:
+        item = data.get(par.replace("-", ""))
+        if item is not None:
+            provider_cache.set(f"awesomeapi:{par}", item, "AwesomeAPI", duracao)
+    return data
+
+
+def _lote_para(pares: Set[str]) -> asyncio.Task:
+    """Lote em andamento que já cobre os pares, ou o lote aberto (criado se preciso)"""
+    global _lote_aberto, _lote_task
+    for cobertos, task in _em_andamento:
+        if pares <= cobertos:
+            return task
+
+    if _lote_aberto is None:
+        _lote_aberto = set()
+        _lote_task = asyncio.create_task(_buscar_lote(_lote_aberto))
+        entrada = (_lote_aberto, _lote_task)
+        _em_andamento.append(entrada)
+        _lote_task.add_done_callback(lambda _t: _em_andamento.remove(entrada))
+    _lote_aberto.update(pares)
+    return _lote_task
+
+
+async def awesomeapi_last(pares: Iterable[str]) -> Optional[Dict]:
+    """
+    Cotações /last da AwesomeAPI no formato original ({"USDBRL": {...}}).
+    Pares frescos vêm do cache; os demais entram no lote aberto, e pedidos
+    concorrentes com pares sobrepostos viram uma única requisição com a união.
+    """
+    result = {}
+    faltando = set()
+    for par in pares:
+        entry = provider_cache.get(f"awesomeapi:{par}")
+        if entry is not None:
+            result[par.replace("-", "")] = entry.value
+        else:
+            faltando.add(par)
+
+    if not faltando:
+        provider_cache.hits += 1
+        return result
+
+    provider_cache.misses += 1
+    data = await asyncio.shield(_lote_para(faltando))
+    if data is None:
+        return None
+
+    for par in faltando:
+        chave = par.replace("-", "")
+        if chave in data:
+            result[chave] = data[chave]
+    return result
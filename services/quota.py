@@ -0,0 +1,124 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+import logging
+from services.upstreams import COINGECKO_URL, HGBRASIL_URL
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prioridades: tráfego de usuário pode usar todo o orçamento; refresh em background só acima da reserva
+USUARIO = "usuario"
+BACKGROUND = "background"
+
+# Prioridade da task atual (o scheduler e as revalidações em background marcam BACKGROUND)
+prioridade: ContextVar[str] = ContextVar("prioridade", default=USUARIO)
+
+# Fração do bucket reservada para requisições de usuário
+QUOTA_RESERVE = float(os.getenv("QUOTA_RESERVE", "0.5"))
+
+
+class QuotaExceededError(Exception):
+    """Requisição não enviada: o orçamento do provedor está esgotado para esta prioridade"""
+
+    def __init__(self, provider: str, prioridade: str):
+        super().__init__(f"Cota de {provider} esgotada (prioridade {prioridade})")
+        self.provider = provider
+        self.prioridade = prioridade
+
+
+class TokenBucket:
+    """Token bucket: `capacity` requisições de rajada, reabastecido a `rate` tokens/s"""
+
+    def __init__(self, name: str, capacity: float, rate: float, reserve: float = QUOTA_RESERVE):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+        self.reserve = reserve
+        self.tokens = capacity
+        self._last = time.monotonic()
+        self.granted = 0
+        self.denied = {USUARIO: 0, BACKGROUND: 0}
+
+    def _refill(self):
+        agora = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (agora - self._last) * self.rate)
+        self._last = agora
+
+    def try_acquire(self, prio: str = USUARIO) -> bool:
+        self._refill()
+        piso = self.capacity * self.reserve if prio == BACKGROUND else 0.0
+        if self.tokens - 1 >= piso:
+            self.tokens -= 1
+            self.granted += 1
+            return True
+        self.denied[prio] += 1
+        return False
+
+    @property
+    def low(self) -> bool:
+        """Abaixo da reserva: refreshes de baixa prioridade estão sendo adiados"""
+        self._refill()
+        return self.tokens - 1 < self.capacity * self.reserve
+
+    def info(self) -> Dict:
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "rate_per_second": self.rate,
+            "granted": self.granted,
+            "denied": dict(self.denied),
+        }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_by_base: Dict[str, TokenBucket] = {}
+
+
+def register(name: str, base_url: str, capacity: float, rate: float) -> TokenBucket:
+    bucket = _buckets.get(name)
+    if bucket is None:
+        bucket = _buckets[name] = TokenBucket(name, capacity, rate)
+    _by_base[base_url] = bucket
+    return bucket
+
+
+# HG Brasil: chave free/development tem limite diário; CoinGecko free tem limite por minuto
+register(
+    "HG Brasil", HGBRASIL_URL,
+    capacity=float(os.getenv("QUOTA_HGBRASIL_BURST", "20")),
+    rate=float(os.getenv("QUOTA_HGBRASIL_PER_DAY", "1000")) / 86400,
+)
+register(
+    "CoinGecko", COINGECKO_URL,
+    capacity=float(os.getenv("QUOTA_COINGECKO_BURST", "10")),
+    rate=float(os.getenv("QUOTA_COINGECKO_PER_MINUTE", "30")) / 60,
+)
+
+
+def for_url(url: str) -> Optional[TokenBucket]:
+    for base, bucket in _by_base.items():
+        if url.startswith(base):
+            return bucket
+    return None
+
+
+def acquire(url: str, prio: Optional[str] = None):
+    """Consome um token do provedor da URL; levanta QuotaExceededError se não houver orçamento"""
+    bucket = for_url(url)
+    if bucket is None:
+        return
+    prio = prio or prioridade.get()
+    if not bucket.try_acquire(prio):
+        if prio == BACKGROUND:
+            logger.info(f"⏳ [quota] {bucket.name}: orçamento baixo, refresh em background adiado")
+        else:
+            logger.warning(f"⚠️ [quota] {bucket.name}: orçamento esgotado")
+        raise QuotaExceededError(bucket.name, prio)
+
+
+def snapshot() -> Dict[str, Dict]:
+    return {name: bucket.info() for name, bucket in _buckets.items()}
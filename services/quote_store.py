@@ -0,0 +1,80 @@
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+import logging
+from services.cache import CacheEntry
+from services.scheduler import scheduler
+from services.shared_cache import SHARED_CACHE_POLL_SECONDS, shared_cache
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class QuoteStore:
+    """
+    Armazém central de cotações em memória.
+    O scheduler escreve (put) e as rotas só leem (get): leitura é um lookup de dict.
+
+    Com SHARED_CACHE=1 as escritas replicáveis vão também para o cache compartilhado,
+    e cada worker puxa (pull_shared) o que o worker eleito para cada job gravou.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, CacheEntry] = {}
+        self._listeners: List[Callable[[str, CacheEntry], None]] = []
+        self._shared_version = 0
+
+    def on_put(self, listener: Callable[[str, CacheEntry], None]):
+        """Registra um callback chamado a cada escrita (ex: publicar no stream SSE)"""
+        self._listeners.append(listener)
+
+    def _store(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        for listener in self._listeners:
+            try:
+                listener(key, entry)
+            except Exception as e:
+                logger.error(f"❌ Erro no listener do quote store para '{key}': {e}")
+
+    def put(self, key: str, value: Any, source: str, fetch_duration: float = 0.0, replicate: bool = True) -> CacheEntry:
+        """
+        Grava a entrada e notifica os listeners.
+        replicate=False para dados que cada worker deriva sozinho (ou que não são JSON).
+        """
+        entry = CacheEntry(value, source, fetch_duration)
+        self._store(key, entry)
+        if replicate and shared_cache is not None:
+            try:
+                shared_cache.write(f"store:{key}", entry.body, entry.fetched_at, source, fetch_duration)
+            except Exception as e:
+                logger.warning(f"⚠️ '{key}' não foi gravado no cache compartilhado: {e}")
+        return entry
+
+    async def pull_shared(self) -> bool:
+        """Aplica localmente as entradas gravadas por outros workers desde o último pull"""
+        for row in shared_cache.changes("store:", self._shared_version):
+            self._shared_version = max(self._shared_version, row.version)
+            key = row.key[len("store:"):]
+            local = self._entries.get(key)
+            if local is None or row.fetched_at > local.fetched_at:
+                self._store(key, CacheEntry.from_body(row.body, row.source, row.fetch_duration, row.fetched_at))
+        return True
+
+    def get(self, key: str, max_age: Optional[timedelta] = None) -> Optional[CacheEntry]:
+        """Retorna a entrada, ou None se não existir / estiver mais velha que max_age"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if max_age is not None and entry.age > max_age.total_seconds():
+            return None
+        return entry
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {key: entry.info() for key, entry in self._entries.items()}
+
+
+quote_store = QuoteStore()
+
+if shared_cache is not None:
+    # Todo worker segue as cotações dos outros (não é job eleito)
+    scheduler.add_job("shared-cache", quote_store.pull_shared, SHARED_CACHE_POLL_SECONDS, elect=False)
@@ -0,0 +1,62 @@
+from hashlib import blake2b
+from typing import Any, Optional
+import orjson
+from fastapi import Request, Response
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa para bytes JSON (UTF-8, sem escapar acentos); aceita tipos NumPy"""
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def loads(body: bytes) -> Any:
+    return orjson.loads(body)
+
+
+def etag_for(body: bytes) -> str:
+    """ETag forte derivado do conteúdo (mesmos bytes → mesma tag, em qualquer worker)"""
+    return f'"{blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def json_bytes(body: bytes, status_code: int = 200) -> Response:
+    """Resposta com o JSON já serializado: sem jsonable_encoder nem encoder da stdlib no caminho quente"""
+    return Response(content=body, status_code=status_code, media_type=JSON_MEDIA_TYPE)
+
+
+def _etag_match(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in tags
+
+
+def cached_json(request: Request, body: bytes, etag: str, max_age: float, stale: float) -> Response:
+    """
+    Resposta JSON cacheável pelo cliente/CDN:
+    - ETag + If-None-Match: 304 sem corpo quando o cliente já tem a versão atual
+    - Cache-Control com o TTL restante (max-age) e a janela de stale-while-revalidate
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max(int(max_age), 0)}, stale-while-revalidate={max(int(stale), 0)}",
+    }
+    if _etag_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def value_response(request: Request, value: Any, max_age: float, stale: float) -> Response:
+    """cached_json para um valor montado na hora: ETag derivado dos bytes serializados"""
+    body = dumps(value)
+    return cached_json(request, body, etag_for(body), max_age, stale)
+
+
+def entry_response(request: Request, entry, soft_ttl: float, hard_ttl: float) -> Response:
+    """cached_json para uma CacheEntry: frescor e janela stale calculados a partir da idade da entrada"""
+    age = entry.age
+    return cached_json(request, entry.body, entry.etag, soft_ttl - age, hard_ttl - max(age, soft_ttl))
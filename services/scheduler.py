@@ -0,0 +1,127 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List
+import logging
+from services import quota
+from services.shared_cache import SHARED_CACHE_LEASE_SECONDS, shared_cache
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SCHEDULER_ENABLED=0 desliga a ingestão em background (rotas voltam a buscar sob demanda)
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") != "0"
+
+Job = Callable[[], Awaitable[bool]]
+
+
+class PollingJob:
+    """
+    Job periódico: roda fn a cada interval segundos (fn retorna True se deu certo).
+    Com cache compartilhado, jobs eleitos (elect=True) só rodam no worker que detém o lease do job.
+    """
+
+    def __init__(self, name: str, fn: Job, interval: float, elect: bool = True):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.elect = elect and shared_cache is not None
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_ok = None
+
+    def _eleito(self) -> bool:
+        # Lease cobre o intervalo + margem: se este worker morrer, outro assume na rodada seguinte
+        return shared_cache.try_lease(f"job:{self.name}", self.interval + SHARED_CACHE_LEASE_SECONDS)
+
+    async def run_once(self) -> bool:
+        if self.elect and not self._eleito():
+            # Outro worker roda este job; as cotações chegam pelo cache compartilhado
+            self.skipped += 1
+            return True
+
+        inicio = time.perf_counter()
+        try:
+            ok = bool(await self.fn())
+        except Exception as e:
+            logger.error(f"❌ [scheduler] Job '{self.name}' falhou: {e}")
+            ok = False
+
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_duration = time.perf_counter() - inicio
+        if ok:
+            self.last_ok = self.last_run
+        else:
+            self.failures += 1
+            logger.warning(f"⚠️ [scheduler] Job '{self.name}' sem dados nesta rodada")
+        return ok
+
+    async def loop(self):
+        # Polling é baixa prioridade: adiado quando o orçamento do provedor está baixo
+        quota.prioridade.set(quota.BACKGROUND)
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def info(self) -> Dict:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_run": self.last_run,
+            "last_ok": self.last_ok,
+            "last_duration": self.last_duration,
+        }
+
+
+class Scheduler:
+    """Agendador em processo: cada job roda em sua própria Task com intervalo independente"""
+
+    def __init__(self):
+        self.jobs: Dict[str, PollingJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, fn: Job, interval: float, elect: bool = True):
+        self.jobs[name] = PollingJob(name, fn, interval, elect)
+
+    def job(self, name: str, interval: float):
+        """Decorator para registrar um job: @scheduler.job("bcb", 3600)"""
+        def decorator(fn: Job) -> Job:
+            self.add_job(name, fn, interval)
+            return fn
+        return decorator
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        if not SCHEDULER_ENABLED:
+            logger.info("⏸️ [scheduler] Desativado (SCHEDULER_ENABLED=0)")
+            return
+        if self.running:
+            return
+        for job in self.jobs.values():
+            logger.info(f"⏰ [scheduler] Iniciando job '{job.name}' a cada {job.interval:.0f}s")
+            self._tasks.append(asyncio.create_task(job.loop(), name=f"scheduler:{job.name}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if shared_cache is not None:
+            shared_cache.release_all()
+        logger.info("⏹️ [scheduler] Jobs encerrados")
+
+    def snapshot(self) -> Dict:
+        return {name: job.info() for name, job in self.jobs.items()}
+
+
+scheduler = Scheduler()
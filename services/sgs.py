@@ -0,0 +1,178 @@
+import asyncio
+import calendar
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import numpy as np
+from services import http_client
+from services.singleflight import upstream
+from services.timeseries import timeseries
+from services.upstreams import BCB_URL
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SGS_URL = BCB_URL + "/dados/serie/bcdata.sgs.{codigo}/dados"
+
+# Séries do SGS disponíveis localmente (código → descrição)
+SERIES = {
+    432: "Taxa SELIC Meta (% a.a.)",
+    13522: "IPCA - 12 meses (% a.a.)",
+    433: "IPCA - variação mensal (%)",
+    4389: "CDI anualizado base 252 (% a.a.)",
+    7811: "TR - Taxa Referencial mensal (% a.m.)",
+}
+
+# Primeira carga: o BCB limita consultas de séries diárias a 10 anos
+SGS_BACKFILL_ANOS = min(int(os.getenv("SGS_BACKFILL_ANOS", "10")), 10)
+# Séries sincronizadas há mais que isso são atualizadas antes de responder /indicadores/serie
+SGS_SYNC_SECONDS = float(os.getenv("SGS_SYNC_SECONDS", "3600"))
+
+
+def _symbol(codigo: int) -> str:
+    return f"sgs:{codigo}"
+
+
+class SerieSGS:
+    """Série do SGS em memória, em colunas: dias (datetime64[D]) e valores (float64), ordenados"""
+
+    __slots__ = ("codigo", "dias", "valores")
+
+    def __init__(self, codigo: int, dias: np.ndarray, valores: np.ndarray):
+        self.codigo = codigo
+        self.dias = dias
+        self.valores = valores
+
+    def __len__(self) -> int:
+        return len(self.dias)
+
+    def merge(self, dias: np.ndarray, valores: np.ndarray):
+        """Anexa observações novas; as que já existiam a partir do primeiro dia novo são substituídas"""
+        if not len(dias):
+            return
+        corte = np.searchsorted(self.dias, dias[0], side="left")
+        self.dias = np.concatenate([self.dias[:corte], dias])
+        self.valores = np.concatenate([self.valores[:corte], valores])
+
+    def intervalo(self, inicio: Optional[date] = None, fim: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Fatia [inicio, fim] (inclusivo) por busca binária, sem copiar"""
+        i = np.searchsorted(self.dias, np.datetime64(inicio, "D"), side="left") if inicio else 0
+        j = np.searchsorted(self.dias, np.datetime64(fim, "D"), side="right") if fim else len(self.dias)
+        return self.dias[i:j], self.valores[i:j]
+
+    def ultimo(self) -> Optional[Tuple[date, float]]:
+        if not len(self.dias):
+            return None
+        return self.dias[-1].astype(date), float(self.valores[-1])
+
+
+def _parse(data: List[Dict]) -> Tuple[List[Tuple[str, int, float]], np.ndarray, np.ndarray]:
+    """JSON do SGS ({"data": "dd/mm/aaaa", "valor": "x"}) → barras para o SQLite e colunas"""
+    bars = []
+    for item in data:
+        try:
+            dia = datetime.strptime(item["data"], "%d/%m/%Y").date()
+            valor = float(item["valor"])
+        except (KeyError, ValueError, TypeError):
+            continue
+        bars.append((dia.isoformat(), calendar.timegm(dia.timetuple()), valor))
+
+    bars.sort(key=lambda bar: bar[1])
+    dias = np.array([bar[0] for bar in bars], dtype="datetime64[D]")
+    valores = np.array([bar[2] for bar in bars], dtype=np.float64)
+    return bars, dias, valores
+
+
+class SGSStore:
+    """
+    Séries do SGS (Banco Central) mantidas localmente:
+    - persistidas na série temporal SQLite (símbolo "sgs:<código>")
+    - em memória como arrays NumPy, carregadas uma vez e atualizadas incrementalmente
+    - a atualização só pede ao BCB os dias a partir da última observação salva
+    """
+
+    def __init__(self):
+        self._series: Dict[int, SerieSGS] = {}
+        # Quando cada série em memória foi carregada/atualizada (outro worker pode ter sincronizado depois)
+        self._loaded: Dict[int, float] = {}
+
+    def serie(self, codigo: int) -> SerieSGS:
+        serie = self._series.get(codigo)
+        if serie is None:
+            self._loaded[codigo] = time.time()
+            rows = timeseries.query(_symbol(codigo))
+            ts = np.array([row[0] for row in rows], dtype=np.int64)
+            dias = (ts // 86400).astype("datetime64[D]")
+            valores = np.array([row[1] for row in rows], dtype=np.float64)
+            serie = self._series[codigo] = SerieSGS(codigo, dias, valores)
+        return serie
+
+    async def _fetch(self, codigo: int, inicio: date, fim: date) -> Optional[List[Dict]]:
+        url = SGS_URL.format(codigo=codigo)
+        params = {"formato": "json", "dataInicial": f"{inicio:%d/%m/%Y}", "dataFinal": f"{fim:%d/%m/%Y}"}
+        logger.info(f"   → Requisitando SGS {codigo}: {inicio} → {fim}")
+        resp = await http_client.get(url, timeout=10, params=params)
+
+        if resp.status_code != 200:
+            logger.error(f"❌ SGS {codigo} retornou status {resp.status_code}")
+            return None
+        return resp.json()
+
+    async def _sync(self, codigo: int) -> bool:
+        symbol = _symbol(codigo)
+        last_day = timeseries.last_day(symbol)
+        hoje = date.today()
+        if last_day is None:
+            inicio = hoje - timedelta(days=365 * SGS_BACKFILL_ANOS)
+            logger.info(f"🗄️ Backfill da série SGS {codigo} desde {inicio}")
+        else:
+            # Inclui a última observação salva (o valor do dia corrente pode ser revisado)
+            inicio = date.fromisoformat(last_day)
+
+        try:
+            data = await self._fetch(codigo, inicio, hoje)
+        except Exception as e:
+            logger.error(f"❌ Erro ao sincronizar série SGS {codigo}: {e}")
+            return False
+        if data is None:
+            return False
+
+        bars, dias, valores = _parse(data)
+        timeseries.upsert(symbol, bars)
+        self.serie(codigo).merge(dias, valores)
+        self._loaded[codigo] = time.time()
+        logger.info(f"✅ Série SGS {codigo} sincronizada (+{len(bars)} observações)")
+        return True
+
+    async def sync(self, codigos: Iterable[int]) -> Dict[int, bool]:
+        """Sincroniza as séries em paralelo (uma busca em andamento por série)"""
+        codigos = list(codigos)
+        results = await asyncio.gather(
+            *(upstream.do(_symbol(codigo), lambda codigo=codigo: self._sync(codigo)) for codigo in codigos)
+        )
+        return dict(zip(codigos, results))
+
+    async def ensure(self, codigo: int):
+        """Sincroniza sob demanda se a série nunca foi baixada ou está desatualizada"""
+        last_sync = timeseries.last_sync(_symbol(codigo))
+        if last_sync is None or time.time() - last_sync > SGS_SYNC_SECONDS:
+            await self.sync([codigo])
+        elif last_sync > self._loaded.get(codigo, 0.0):
+            # Sincronizada por outro worker no mesmo SQLite: recarrega as colunas
+            self._series.pop(codigo, None)
+
+    def validade(self, codigo: int) -> float:
+        """Segundos até a série ficar desatualizada (próxima sincronização); 0 se já está ou nunca sincronizou"""
+        last_sync = timeseries.last_sync(_symbol(codigo))
+        if last_sync is None:
+            return 0.0
+        return max(SGS_SYNC_SECONDS - (time.time() - last_sync), 0.0)
+
+    def ultimo(self, codigo: int) -> Optional[Tuple[date, float]]:
+        return self.serie(codigo).ultimo()
+
+
+sgs = SGSStore()
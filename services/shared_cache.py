@@ -0,0 +1,144 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+import logging
+from services.timeseries import DATA_DIR
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SHARED_CACHE=1 compartilha caches e quote store entre workers (uvicorn --workers N) via SQLite WAL
+SHARED_CACHE = os.getenv("SHARED_CACHE", "0") == "1"
+SHARED_CACHE_DB = os.getenv("SHARED_CACHE_DB", os.path.join(DATA_DIR, "shared_cache.db"))
+# Frequência com que cada worker puxa as cotações gravadas pelos outros
+SHARED_CACHE_POLL_SECONDS = float(os.getenv("SHARED_CACHE_POLL_SECONDS", "1"))
+# Prazo de um refresh eleito: depois disso outro worker pode assumir a chave
+SHARED_CACHE_LEASE_SECONDS = float(os.getenv("SHARED_CACHE_LEASE_SECONDS", "30"))
+# Sem nenhum valor, quanto um worker espera o eleito preencher antes de buscar ele mesmo
+SHARED_CACHE_WAIT_SECONDS = float(os.getenv("SHARED_CACHE_WAIT_SECONDS", "5"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    fetch_duration REAL NOT NULL,
+    owner TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS entries_version ON entries (version);
+
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class SharedRow(NamedTuple):
+    key: str
+    body: bytes
+    fetched_at: float
+    source: str
+    fetch_duration: float
+    owner: str
+    version: int
+
+
+class SharedCache:
+    """
+    Backend de cache compartilhado entre processos, sem serviço externo (arquivo SQLite em WAL).
+    - entradas guardam o JSON já serializado (o mesmo body servido pelas rotas)
+    - leases elegem um único worker para atualizar cada chave/job; expiram se ele morrer
+    Leituras quentes continuam no dict local de cada worker: o SQLite só é consultado
+    quando a entrada local falta ou venceu, e pelo poll periódico do quote store.
+    """
+
+    def __init__(self, path: str = SHARED_CACHE_DB):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # isolation_level=None: cada comando é sua própria transação (escritas curtas)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            logger.info(f"🗄️ Cache compartilhado aberto em {self.path} (worker {WORKER_ID})")
+        return self._conn
+
+    def write(self, key: str, body: bytes, fetched_at: float, source: str, fetch_duration: float):
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO entries (key, body, fetched_at, source, fetch_duration, owner, version)
+                VALUES (?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM entries))
+                """,
+                (key, body, fetched_at, source, fetch_duration, WORKER_ID),
+            )
+
+    def read(self, key: str) -> Optional[SharedRow]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT key, body, fetched_at, source, fetch_duration, owner, version FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+        return SharedRow(*row) if row else None
+
+    def changes(self, prefix: str, since: int) -> List[SharedRow]:
+        """Entradas gravadas por outros workers depois da versão `since` (ordem de gravação)"""
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT key, body, fetched_at, source, fetch_duration, owner, version FROM entries
+                WHERE version > ? AND key >= ? AND key < ? AND owner != ?
+                ORDER BY version
+                """,
+                (since, prefix, prefix + "\uffff", WORKER_ID),
+            ).fetchall()
+        return [SharedRow(*row) for row in rows]
+
+    def try_lease(self, key: str, ttl: float) -> bool:
+        """Elege este worker para a chave (ou renova a eleição); False se outro worker a detém"""
+        agora = time.time()
+        with self._lock:
+            cur = self.conn.execute(
+                """
+                INSERT INTO leases (key, owner, expires) VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires
+                WHERE leases.owner = excluded.owner OR leases.expires < ?
+                """,
+                (key, WORKER_ID, agora + ttl, agora),
+            )
+        return cur.rowcount == 1
+
+    def release(self, key: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, WORKER_ID))
+
+    def release_all(self):
+        """Libera as eleições deste worker (shutdown): outro worker assume sem esperar expirar"""
+        with self._lock:
+            self.conn.execute("DELETE FROM leases WHERE owner = ?", (WORKER_ID,))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+shared_cache: Optional[SharedCache] = SharedCache() if SHARED_CACHE else None
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+import logging
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _SyncCall:
+    """Chamada síncrona em andamento: quem chegar depois espera no Event"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalescência de requisições: no máximo uma busca em andamento por chave
+    (recurso do upstream); todos os que pedirem a mesma chave compartilham o resultado.
+
+    - do(): para rotas/funções async (uma Task compartilhada por chave)
+    - do_sync(): para rotas síncronas rodando no threadpool
+    """
+
+    def __init__(self, name: str = "upstream"):
+        self.name = name
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._calls: Dict[str, _SyncCall] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._tasks or key in self._calls
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Inicia (ou reaproveita) a busca da chave sem aguardar o resultado"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._tasks[key] = task
+
+            def forget(t: asyncio.Task):
+                if self._tasks.get(key) is t:
+                    del self._tasks[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.coalesced += 1
+            logger.info(f"🔗 [{self.name}] Aguardando busca já em andamento: {key}")
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # shield: se um dos interessados for cancelado, a busca continua para os demais
+        return await asyncio.shield(self.start(key, fn))
+
+    def do_sync(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _SyncCall()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            logger.info(f"🔗 [{self.name}] Aguardando busca já em andamento: {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+# Grupo compartilhado para buscas diretas nos upstreams (chave = recurso/URL)
+upstream = SingleFlight()
@@ -0,0 +1,98 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+import logging
+from services.responses import dumps
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fila por assinante: quem ficar mais de N eventos atrasado é desconectado
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "32"))
+# Comentário SSE periódico para manter proxies/conexões abertas
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+_HEARTBEAT = b": ping\n\n"
+
+
+class _Subscriber:
+    __slots__ = ("queue", "canais", "closed")
+
+    def __init__(self, canais: Optional[Set[str]]):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.canais = canais
+        self.closed = False
+
+
+class StreamHub:
+    """
+    Fan-out de Server-Sent Events:
+    - cada atualização é serializada uma única vez (bytes prontos) e enfileirada para todos
+    - só publica quando o payload do canal muda
+    - novos assinantes recebem o último evento de cada canal imediatamente
+    """
+
+    def __init__(self):
+        self._subscribers: Set[_Subscriber] = set()
+        self._last: Dict[str, bytes] = {}
+        self._last_payload: Dict[str, bytes] = {}
+        self._seq = 0
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, canal: str, data: Any) -> bool:
+        """
+        Publica no canal; retorna False se o dado não mudou desde a última publicação.
+        `data` pode vir já serializado (bytes JSON), como o body das entradas do quote store.
+        """
+        payload = data if isinstance(data, bytes) else dumps(data)
+        if self._last_payload.get(canal) == payload:
+            return False
+
+        self._seq += 1
+        frame = b"id: %d\nevent: %s\ndata: %s\n\n" % (self._seq, canal.encode(), payload)
+        self._last_payload[canal] = payload
+        self._last[canal] = frame
+        self.published += 1
+
+        for sub in list(self._subscribers):
+            if sub.canais is not None and canal not in sub.canais:
+                continue
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Assinante lento: desconecta em vez de acumular memória
+                self.dropped += 1
+                sub.closed = True
+                self._subscribers.discard(sub)
+                logger.warning("⚠️ [stream] Assinante lento desconectado")
+        return True
+
+    async def subscribe(self, canais: Optional[Iterable[str]] = None) -> AsyncIterator[bytes]:
+        """Gera os frames SSE para um cliente até ele desconectar"""
+        sub = _Subscriber(set(canais) if canais else None)
+
+        # Snapshot inicial: o cliente não precisa esperar a próxima mudança
+        for canal, frame in self._last.items():
+            if sub.canais is None or canal in sub.canais:
+                sub.queue.put_nowait(frame)
+
+        self._subscribers.add(sub)
+        logger.info(f"📡 [stream] Novo assinante ({self.subscribers} conectados)")
+        try:
+            while not sub.closed or not sub.queue.empty():
+                try:
+                    yield await asyncio.wait_for(sub.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield _HEARTBEAT
+        finally:
+            self._subscribers.discard(sub)
+            logger.info(f"📡 [stream] Assinante saiu ({self.subscribers} conectados)")
+
+
+hub = StreamHub()
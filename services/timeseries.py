@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+import logging
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Diretório de dados locais (SQLite); em produção aponte para um volume persistente
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+TIMESERIES_DB = os.getenv("TIMESERIES_DB", os.path.join(DATA_DIR, "timeseries.db"))
+
+Bar = Tuple[str, int, float]  # (dia "YYYY-MM-DD", timestamp, valor)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    day TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (symbol, day)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    symbol TEXT PRIMARY KEY,
+    last_sync REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT PRIMARY KEY,
+    since TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS coverage_windows (
+    symbol TEXT NOT NULL,
+    inicio TEXT NOT NULL,
+    fim TEXT NOT NULL,
+    PRIMARY KEY (symbol, inicio, fim)
+) WITHOUT ROWID;
+"""
+
+
+class TimeSeriesStore:
+    """
+    Série temporal diária por símbolo em SQLite (WAL).
+    Um candle por dia: o candle do dia corrente é sobrescrito a cada sync.
+    """
+
+    def __init__(self, path: str = TIMESERIES_DB):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            logger.info(f"🗄️ Série temporal aberta em {self.path}")
+        return self._conn
+
+    def upsert(self, symbol: str, bars: Iterable[Bar]) -> int:
+        rows = [(symbol, day, ts, valor) for day, ts, valor in bars]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO bars (symbol, day, ts, valor) VALUES (?, ?, ?, ?)", rows
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (symbol, last_sync) VALUES (?, ?)", (symbol, time.time())
+            )
+        return len(rows)
+
+    def last_day(self, symbol: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(day) FROM bars WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def first_day(self, symbol: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT MIN(day) FROM bars WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def coverage_since(self, symbol: str) -> Optional[str]:
+        """Dia mais antigo já pedido ao upstream (mesmo que não houvesse dados antes dele)"""
+        with self._lock:
+            row = self.conn.execute("SELECT since FROM coverage WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def set_coverage(self, symbol: str, since: str):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO coverage (symbol, since) VALUES (?, ?)", (symbol, since))
+
+    def window_covered(self, symbol: str, inicio: str, fim: str) -> bool:
+        """Período isolado (antes da cobertura contínua) já pedido ao upstream por inteiro"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM coverage_windows WHERE symbol = ? AND inicio <= ? AND fim >= ? LIMIT 1",
+                (symbol, inicio, fim),
+            ).fetchone()
+        return row is not None
+
+    def add_window(self, symbol: str, inicio: str, fim: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO coverage_windows (symbol, inicio, fim) VALUES (?, ?, ?)", (symbol, inicio, fim)
+            )
+
+    def last_sync(self, symbol: str) -> Optional[float]:
+        with self._lock:
+            row = self.conn.execute("SELECT last_sync FROM sync_state WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def query(self, symbol: str, start: Optional[str] = None, end: Optional[str] = None,
+              last: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(timestamp, valor) em ordem cronológica; start/end são dias 'YYYY-MM-DD' inclusivos"""
+        sql = "SELECT ts, valor FROM bars WHERE symbol = ?"
+        params: list = [symbol]
+        if start:
+            sql += " AND day >= ?"
+            params.append(start)
+        if end:
+            sql += " AND day <= ?"
+            params.append(end)
+
+        if last:
+            # Últimos N dias: busca do fim para o começo e inverte
+            sql += " ORDER BY day DESC LIMIT ?"
+            params.append(last)
+            with self._lock:
+                rows = self.conn.execute(sql, params).fetchall()
+            return rows[::-1]
+
+        sql += " ORDER BY day"
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+timeseries = TimeSeriesStore()
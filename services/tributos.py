@@ -0,0 +1,151 @@
+import json
+import os
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+import logging
+import numpy as np
+
+# Configuração de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tabelas de INSS/IRRF por competência (dados, não código: nova tabela = nova entrada no JSON)
+TABELAS_TRIBUTOS = os.getenv(
+    "TABELAS_TRIBUTOS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tributos.json")
+)
+# Competência usada quando a requisição não informa uma (AAAA-MM)
+TRIBUTOS_COMPETENCIA = os.getenv("TRIBUTOS_COMPETENCIA", "2024-02")
+
+
+class TabelaTributos:
+    """
+    Uma vigência de INSS e IRRF já compilada: tetos ordenados para busca binária e, no INSS,
+    a contribuição acumulada das faixas cheias anteriores, para que o cálculo seja
+    acumulado[faixa] + (base - início da faixa) × alíquota em O(log faixas).
+    """
+
+    __slots__ = (
+        "vigencia", "deducao_dependente",
+        "inss_limites", "inss_aliquotas", "inss_inicios", "inss_acumulado", "teto_inss",
+        "irrf_limites", "irrf_aliquotas", "irrf_deducoes",
+        "_inss", "_irrf",
+    )
+
+    def __init__(self, vigencia: str, inss: List[List[float]], irrf: List[List[Optional[float]]],
+                 deducao_dependente: float):
+        self.vigencia = vigencia
+        self.deducao_dependente = float(deducao_dependente)
+
+        limites = [float(limite) for limite, _ in inss]
+        aliquotas = [float(aliquota) for _, aliquota in inss]
+        inicios = [0.0] + limites[:-1]
+        acumulado = [0.0]
+        for inicio, limite, aliquota in zip(inicios[:-1], limites[:-1], aliquotas[:-1]):
+            acumulado.append(acumulado[-1] + (limite - inicio) * aliquota)
+        self._inss = (limites, aliquotas, inicios, acumulado)
+        self.teto_inss = limites[-1]
+
+        # Teto null = última faixa, sem limite
+        irrf_limites = [float("inf") if limite is None else float(limite) for limite, _, _ in irrf]
+        self._irrf = (irrf_limites, [float(a) for _, a, _ in irrf], [float(d) for _, _, d in irrf])
+
+        # Cópias em NumPy para o cálculo em lote (services/folha.py)
+        self.inss_limites, self.inss_aliquotas, self.inss_inicios, self.inss_acumulado = map(np.array, self._inss)
+        self.irrf_limites, self.irrf_aliquotas, self.irrf_deducoes = map(np.array, self._irrf)
+        self._validar()
+
+    def _validar(self):
+        for nome, limites in (("inss", self._inss[0]), ("irrf", self._irrf[0])):
+            if not limites or any(b <= a for a, b in zip(limites, limites[1:])):
+                raise ValueError(f"Tabela {self.vigencia}: tetos do {nome} precisam ser crescentes")
+        if self._irrf[0][-1] != float("inf"):
+            raise ValueError(f"Tabela {self.vigencia}: a última faixa do IRRF precisa ter teto null")
+        if not all(0 <= a < 1 for a in self._inss[1] + self._irrf[1]):
+            raise ValueError(f"Tabela {self.vigencia}: alíquotas fora de [0, 1)")
+
+    def inss(self, salario: float) -> float:
+        """Contribuição do empregado (progressiva, limitada ao teto)"""
+        limites, aliquotas, inicios, acumulado = self._inss
+        base = min(salario, self.teto_inss)
+        if base <= 0:
+            return 0.0
+        faixa = min(bisect_left(limites, base), len(limites) - 1)
+        return acumulado[faixa] + (base - inicios[faixa]) * aliquotas[faixa]
+
+    def irrf(self, base: float) -> float:
+        """Imposto mensal pela parcela a deduzir da faixa em que a base cai"""
+        limites, aliquotas, deducoes = self._irrf
+        faixa = min(bisect_left(limites, base), len(limites) - 1)
+        return max(base * aliquotas[faixa] - deducoes[faixa], 0.0)
+
+    def calcular(self, salarios: np.ndarray, dependentes: np.ndarray, outros: np.ndarray) -> Dict[str, np.ndarray]:
+        """Mesmo cálculo para um bloco inteiro de funcionários, com searchsorted no lugar do bisect"""
+        base_inss = np.minimum(salarios, self.teto_inss)
+        faixa = np.minimum(np.searchsorted(self.inss_limites, base_inss, side="left"), len(self.inss_limites) - 1)
+        inss = np.where(
+            base_inss > 0,
+            self.inss_acumulado[faixa] + (base_inss - self.inss_inicios[faixa]) * self.inss_aliquotas[faixa],
+            0.0,
+        )
+
+        base_irrf = salarios - inss - dependentes * self.deducao_dependente
+        # NaN (linha inválida) cai depois do último teto; o min mantém o índice válido
+        faixa = np.minimum(np.searchsorted(self.irrf_limites, base_irrf, side="left"), len(self.irrf_limites) - 1)
+        irrf = np.maximum(base_irrf * self.irrf_aliquotas[faixa] - self.irrf_deducoes[faixa], 0.0)
+
+        descontos = inss + irrf + outros
+        return {
+            "salario_bruto": salarios,
+            "inss": inss,
+            "irrf": irrf,
+            "outros_descontos": outros,
+            "salario_liquido": salarios - descontos,
+            "total_descontos": descontos,
+        }
+
+    def descricao(self) -> Dict:
+        limites, aliquotas, _, _ = self._inss
+        irrf_limites, irrf_aliquotas, deducoes = self._irrf
+        return {
+            "vigencia": self.vigencia,
+            "inss": [{"ate": l, "aliquota": a} for l, a in zip(limites, aliquotas)],
+            "irrf": [{"ate": None if l == float("inf") else l, "aliquota": a, "deducao": d}
+                     for l, a, d in zip(irrf_limites, irrf_aliquotas, deducoes)],
+            "deducao_dependente": self.deducao_dependente,
+        }
+
+
+class RegistroTributos:
+    """Tabelas ordenadas por vigência; a competência AAAA-MM usa a última que começou até ela"""
+
+    def __init__(self):
+        self._vigencias: List[str] = []
+        self._tabelas: List[TabelaTributos] = []
+
+    def carregar(self, caminho: str = TABELAS_TRIBUTOS):
+        """Lê e compila todas as tabelas do JSON (uma vez, na importação)"""
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        tabelas = sorted(
+            (TabelaTributos(t["vigencia"], t["inss"], t["irrf"], t["deducao_dependente"]) for t in dados["tabelas"]),
+            key=lambda t: t.vigencia,
+        )
+        self._vigencias = [t.vigencia for t in tabelas]
+        self._tabelas = tabelas
+        logger.info(f"🧾 [tributos] {len(tabelas)} tabelas de INSS/IRRF carregadas ({', '.join(self._vigencias)})")
+
+    def tabela(self, competencia: Optional[str] = None) -> TabelaTributos:
+        """Tabela vigente na competência (padrão: TRIBUTOS_COMPETENCIA); ValueError se anterior a todas"""
+        competencia = competencia or TRIBUTOS_COMPETENCIA
+        i = bisect_right(self._vigencias, competencia) - 1
+        if i < 0:
+            raise ValueError(f"Sem tabela de INSS/IRRF para a competência {competencia} "
+                             f"(a mais antiga é {self._vigencias[0] if self._vigencias else '-'})")
+        return self._tabelas[i]
+
+    def snapshot(self) -> List[Dict]:
+        return [t.descricao() for t in self._tabelas]
+
+
+tributos = RegistroTributos()
+tributos.carregar()
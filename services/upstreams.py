@@ -0,0 +1,22 @@
+import os
+
+# URLs base dos provedores externos (sobrescreva para apontar para um mirror/proxy)
+# UPSTREAM_STUB_URL aponta todos de uma vez para o servidor local do bench (bench/upstream_stub.py)
+UPSTREAM_STUB_URL = os.getenv("UPSTREAM_STUB_URL", "").rstrip("/")
+
+
+def _base(env: str, default: str, stub_path: str) -> str:
+    if UPSTREAM_STUB_URL:
+        default = f"{UPSTREAM_STUB_URL}/{stub_path}"
+    return os.getenv(env, default).rstrip("/")
+
+
+AWESOMEAPI_URL = _base("AWESOMEAPI_URL", "https://economia.awesomeapi.com.br", "awesomeapi")
+HGBRASIL_URL = _base("HGBRASIL_URL", "https://api.hgbrasil.com", "hgbrasil")
+BCB_URL = _base("BCB_URL", "https://api.bcb.gov.br", "bcb")
+COINGECKO_URL = _base("COINGECKO_URL", "https://api.coingecko.com", "coingecko")
+GOOGLE_NEWS_URL = _base("GOOGLE_NEWS_URL", "https://news.google.com", "googlenews")
+
+# A chave pública da HG Brasil para testes é 'development' (limite baixo)
+# O ideal é criar uma conta grátis em hgbrasil.com e definir HGBRASIL_KEY
+HGBRASIL_KEY = os.getenv("HGBRASIL_KEY", "development")